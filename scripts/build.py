@@ -6,25 +6,86 @@ based on YAML configuration files.
 """
 
 import argparse
+import contextlib
+import copy
+import fcntl
+import hashlib
+import json
+import math
 import os
-import subprocess
 import sys
-import yaml
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any
 
 # Add scripts directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
 from utils import (
     YAMLLoader,
+    ArtifactCache,
+    EnvDict,
     EnvironmentManager,
     FileDownloader,
+    GitCache,
+    BuildRunner,
     BuildConfigResolver,
-    PlatformMatcher
+    CrossCompilingToolchainManager,
+    PlatformMatcher,
+    load_yaml_file,
+    url_basename
 )
 
 
+def run_dependency_graph(
+    dep_list: List[Dict[str, Any]],
+    build_one: Callable[[str, int], None],
+    nproc: int
+) -> None:
+    """
+    Build dependencies concurrently once their ordering constraints are satisfied.
+
+    The nproc budget is split between the builds running at the same time so
+    that nested make invocations do not oversubscribe the machine.
+
+    Args:
+        dep_list: Dependency list from BuildConfigResolver.get_dependencies
+        build_one: Called with (dependency name, jobs for this build)
+        nproc: Total number of parallel jobs
+    """
+    pending = {
+        name: set(depends_on)
+        for name, depends_on in BuildConfigResolver.get_dependency_graph(dep_list).items()
+    }
+
+    # Nothing can overlap, keep the output readable
+    if len(pending) == 1 or nproc == 1:
+        max_workers = 1
+    else:
+        max_workers = min(nproc, len(pending))
+
+    built = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [name for name, depends_on in pending.items() if depends_on <= built]
+            if ready:
+                width = min(max_workers, len(running) + len(ready))
+                jobs = max(1, nproc // width)
+                for name in ready:
+                    del pending[name]
+                    running[executor.submit(build_one, name, jobs)] = name
+
+            if not running:
+                raise ValueError(f"Circular depends_on between dependencies: {', '.join(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                future.result()
+                built.add(name)
+
+
 class DependencyBuilder:
     """Build plugin dependencies."""
 
@@ -48,24 +109,62 @@ class DependencyBuilder:
             parent_config: Parent plugin configuration (for global env)
             building_deps: Set of dependencies currently being built (for cycle detection)
         """
-        self.workdir = Path(workdir)
+        # Keep the str form around; it is what env, downloads and subprocess take
+        self._workdir_str = os.fspath(workdir)
+        self.workdir = Path(self._workdir_str)
         self.prefixdir = prefixdir
         self.platform = platform
         self.nproc = nproc
         self.parent_config = parent_config
-        self.plugins_dir = str(Path(__file__).parent.parent / 'plugins')  # Get plugins directory path
+        self.plugins_dir = Path(__file__).parent.parent / 'plugins'  # Get plugins directory path
+        self._deps_yml_path = self.plugins_dir / 'dependencies.yml'
         # Use provided building_deps or create new set
         self.building_deps = building_deps if building_deps is not None else set()
+        # The process environment does not change during a build; snapshot it once
+        self._base_env = os.environ.copy()
 
-        self.env = EnvironmentManager.get_default_env(platform, str(workdir), prefixdir)
-        # Add NPROC to environment
-        self.env['NPROC'] = str(nproc)
+        self.env = EnvironmentManager.get_default_env(platform, self._workdir_str, prefixdir)
+        # Add NPROC and MAKE_JOBS to environment
+        self.env.update(EnvironmentManager.get_parallel_env(nproc))
 
         # Add parent's global env to self.env if provided
         if parent_config and 'env' in parent_config:
             global_env = EnvironmentManager.merge_global_env(parent_config['env'], platform)
             self.env.update(global_env)
 
+        EnvironmentManager.apply_compiler_cache(self.env, self._workdir_str)
+
+    def _derive(self, nproc: int, building_deps: set) -> 'DependencyBuilder':
+        """
+        Create a builder for a sub-dependency that shares this builder's environment.
+
+        Avoids recomputing the default and global env, which only differ in the job count.
+
+        Args:
+            nproc: Number of parallel jobs
+            building_deps: Set of dependencies currently being built (for cycle detection)
+
+        Returns:
+            New DependencyBuilder
+        """
+        builder = copy.copy(self)
+        builder.nproc = nproc
+        builder.building_deps = building_deps
+        builder.env = EnvDict(self.env)
+        builder.env.update(EnvironmentManager.get_parallel_env(nproc))
+        return builder
+
+    def _load_dependencies_config(self) -> Dict[str, Any]:
+        """
+        Load the full dependency configurations from dependencies.yml.
+
+        Returns:
+            Dependencies section, empty if the file does not exist
+        """
+        if not self._deps_yml_path.exists():
+            return {}
+        return load_yaml_file(self._deps_yml_path).get('dependencies', {})
+
     def _build_sub_dependencies(self, version_config: Dict[str, Any]) -> None:
         """
         Build sub-dependencies of a dependency.
@@ -86,45 +185,32 @@ class DependencyBuilder:
 
         print(f"\nBuilding {len(sub_dep_list)} sub-dependencies...\n")
 
-        # Load full dependency configurations
-        sub_deps_file_path = Path(self.plugins_dir) / 'dependencies.yml'
-        full_sub_deps_config = {}
-        if sub_deps_file_path.exists():
-            with open(sub_deps_file_path, 'r', encoding='utf-8') as f:
-                deps_data = yaml.safe_load(f)
-                full_sub_deps_config = deps_data.get('dependencies', {})
-
-        # Build each sub-dependency
-        for sub_dep in sub_dep_list:
-            sub_dep_name = sub_dep['name']
-            sub_dep_version = sub_dep['version']
+        full_sub_deps_config = self._load_dependencies_config()
+        sub_deps_by_name = {sub_dep['name']: sub_dep for sub_dep in sub_dep_list}
 
+        def build_one(sub_dep_name: str, jobs: int) -> None:
             if sub_dep_name not in full_sub_deps_config:
                 print(f"Warning: Sub-dependency {sub_dep_name} not found in dependencies.yml, skipping...")
-                continue
+                return
 
-            # Create a new DependencyBuilder for the sub-dependency
-            sub_dep_builder = DependencyBuilder(
-                str(self.workdir),
-                self.prefixdir,
-                self.platform,
-                self.nproc,
-                parent_config=self.parent_config,
-                building_deps=self.building_deps  # Pass the same set for cycle detection
-            )
+            # Siblings build concurrently, so each one gets its own copy of the chain for cycle detection
+            sub_dep_builder = self._derive(jobs, set(self.building_deps))
 
             sub_dep_builder.build_dependency(
                 sub_dep_name,
-                sub_dep_version,
+                sub_deps_by_name[sub_dep_name]['version'],
                 full_sub_deps_config[sub_dep_name]
             )
 
+        run_dependency_graph(sub_dep_list, build_one, self.nproc)
+
     def build_dependency(
         self,
         dep_name: str,
         dep_version: str,
-        dep_config: Dict[str, Any]
-    ) -> None:
+        dep_config: Dict[str, Any],
+        env: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
         """
         Build a single dependency.
 
@@ -132,7 +218,13 @@ class DependencyBuilder:
             dep_name: Dependency name
             dep_version: Version to build
             dep_config: Dependency configuration from YAML
+            env: Environment to build with (default: copy of self.env)
+
+        Returns:
+            Environment used for the build, including DL_FILE_NAME
         """
+        env = EnvDict(self.env if env is None else env)
+
         # Create dependency key for cycle detection
         dep_key = f"{dep_name}@{dep_version}"
 
@@ -157,131 +249,219 @@ class DependencyBuilder:
             if not version_config:
                 raise ValueError(f"Version {dep_version} not found for dependency {dep_name}")
 
-            # Build sub-dependencies first (if any)
+            prefixdir = env.get('PREFIXDIR')
+            if prefixdir:
+                prefixdir = EnvironmentManager.substitute_vars(prefixdir, env)
+
+            # Sub-dependencies carry their own stamps, so this is cheap when they are installed
             self._build_sub_dependencies(version_config)
 
-            # Download source
-            source_type = version_config['type']
-            source_url = version_config['source']
-
-            if source_type == 'tarball':
-                filename = source_url.split('/')[-1]
-                dest_path = self.workdir / filename
-
-                if not dest_path.exists():
-                    FileDownloader.download_file(source_url, str(dest_path))
-
-                # Verify hash if provided
-                if 'hash' in version_config:
-                    print(f"Verifying hash for {filename}...")
-                    if not FileDownloader.verify_hash(str(dest_path), version_config['hash']):
-                        raise ValueError(f"Hash verification failed for {filename}")
-                    print("Hash verification passed")
-
-                # Add DL_FILE_NAME to environment
-                self.env['DL_FILE_NAME'] = filename
-
-            elif source_type == 'git':
-                # Clone git repository
-                repo_dir = self.workdir / dep_name
-                if not repo_dir.exists():
-                    print(f"Cloning {source_url}...")
-                    subprocess.run(
-                        ['git', 'clone', source_url, str(repo_dir)],
-                        check=True
-                    )
-                    if 'tag' in version_config:
-                        subprocess.run(
-                            ['git', 'checkout', version_config['tag']],
-                            cwd=str(repo_dir),
-                            check=True
-                        )
-            else:
-                raise ValueError(f"Unknown source type: {source_type}")
-
-            # Get build configuration for this platform
-            build_config = BuildConfigResolver.get_build_config(
-                version_config['build'],
-                self.platform
-            )
+            # Skip dependencies another build already installed into the same prefix
+            recipe_hash = self._get_recipe_hash(version_config, env, frozenset([dep_key]))
+            with self._install_lock(prefixdir, dep_name, dep_version) as stamp_path:
+                if stamp_path and self._read_stamp(stamp_path) == recipe_hash:
+                    print(f"{dep_name} {dep_version} is already installed, skipping...")
+                    return env
 
-            if not build_config:
-                print(f"No build configuration for {self.platform}, skipping...")
-                return
+                if prefixdir and ArtifactCache.is_enabled():
+                    self._install_cached(dep_name, dep_version, version_config, env, prefixdir)
+                else:
+                    self._install_dependency(dep_name, version_config, env)
 
-            # Execute build commands
-            self._execute_build(build_config)
+                if stamp_path:
+                    with open(stamp_path, 'w', encoding='utf-8') as f:
+                        f.write(recipe_hash)
+
+            return env
 
         finally:
             # Remove from building_deps when done (regardless of success or failure)
             self.building_deps.discard(dep_key)
 
-    def _execute_build(self, build_config: Dict[str, Any]) -> None:
+    def _get_recipe_hash(
+        self,
+        version_config: Dict[str, Any],
+        env: Dict[str, str],
+        chain: frozenset = frozenset()
+    ) -> str:
         """
-        Execute build commands.
+        Hash a dependency recipe so install stamps are invalidated when it changes.
+
+        The hashes of its sub-dependencies are included, so changing any recipe
+        also invalidates everything built on top of it.
 
         Args:
-            build_config: Build configuration with env and commands
+            version_config: Version configuration dict
+            env: Environment the build runs with
+            chain: Dependency keys already being hashed, to stop at cycles
+
+        Returns:
+            Hex digest of the platform, toolchain, recipe, build environment
+            and sub-dependency hashes
         """
-        # Merge build environment with base environment
-        build_env = os.environ.copy()
-
-        # Add self.env variables first (includes DL_FILE_NAME, WORKDIR, etc.)
-        # Substitute variables in self.env values before adding to build_env
-        for key, value in self.env.items():
-            substituted_value = EnvironmentManager.substitute_vars(value, self.env)
-            build_env[key] = substituted_value
-
-        # Merge with build_config env (accumulate values for same variables)
-        if 'env' in build_config:
-            for key, value in build_config['env'].items():
-                # Substitute variables in environment values
-                value = EnvironmentManager.substitute_vars(value, self.env)
-
-                # If the variable already exists in build_env, append the new value
-                if key in build_env:
-                    # Check if the existing value and new value are both non-empty
-                    existing_value = build_env[key]
-                    if existing_value and value:
-                        # Append with space separator
-                        build_env[key] = f"{existing_value} {value}"
-                    else:
-                        # If either is empty, use the non-empty one (or the new one)
-                        build_env[key] = value or existing_value
-                else:
-                    # Variable doesn't exist yet, just set it
-                    build_env[key] = value
-
-        # Execute commands
-        commands = build_config.get('commands', [])
-        current_cwd = str(self.workdir)  # Track current working directory
-
-        for cmd_entry in commands:
-            if isinstance(cmd_entry, dict):
-                # Update cwd if specified, otherwise keep current
-                if 'cwd' in cmd_entry:
-                    current_cwd = cmd_entry['cwd']
-                cmd = cmd_entry['cmd']
-            else:
-                cmd = cmd_entry
-
-            # Substitute variables in command and cwd
-            cmd = EnvironmentManager.substitute_vars(cmd, self.env)
-            cwd = EnvironmentManager.substitute_vars(current_cwd, self.env)
-
-            print(f"\n[{cwd}]$ {cmd}")
-
-            # Execute command
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                cwd=cwd,
-                env=build_env,
-                text=True
+        full_deps_config = self._load_dependencies_config()
+        sub_dep_hashes = []
+        for sub_dep in BuildConfigResolver.get_dependencies(version_config.get('dependencies', {}), self.platform):
+            sub_dep_key = f"{sub_dep['name']}@{sub_dep['version']}"
+            sub_version_config = full_deps_config.get(sub_dep['name'], {}).get('versions', {}).get(sub_dep['version'])
+            # Missing recipes are skipped by the build; cycles are reported by build_dependency
+            if not sub_version_config or sub_dep_key in chain:
+                continue
+            sub_dep_hashes.append(
+                [sub_dep_key, self._get_recipe_hash(sub_version_config, env, chain | {sub_dep_key})]
             )
 
-            if result.returncode != 0:
-                raise RuntimeError(f"Command failed with exit code {result.returncode}")
+        payload = json.dumps(
+            [
+                self.platform,
+                CrossCompilingToolchainManager.get_toolchain_config(self.platform),
+                version_config,
+                EnvironmentManager.get_build_inputs(env),
+                sub_dep_hashes,
+            ],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _read_stamp(stamp_path: str) -> Optional[str]:
+        """
+        Read the recipe hash recorded in an install stamp.
+
+        Args:
+            stamp_path: Path to the stamp file
+
+        Returns:
+            Recorded hash or None if the stamp does not exist
+        """
+        try:
+            with open(stamp_path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    @contextlib.contextmanager
+    def _install_lock(
+        self,
+        prefixdir: Optional[str],
+        dep_name: str,
+        dep_version: str
+    ) -> Iterator[Optional[str]]:
+        """
+        Hold an exclusive lock on a dependency's install stamp.
+
+        Stamps live in <PREFIXDIR>/.stamps. If that directory cannot be
+        created (e.g. a root-owned prefix) the build runs unlocked.
+
+        Args:
+            prefixdir: Installation prefix the dependency is built into
+            dep_name: Dependency name
+            dep_version: Dependency version
+
+        Yields:
+            Path to the stamp file, or None if stamps are unavailable
+        """
+        if not prefixdir:
+            yield None
+            return
+
+        stamp_path = os.path.join(prefixdir, '.stamps', f"{dep_name}-{dep_version}.done")
+        try:
+            os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+            lock_file = open(stamp_path + '.lock', 'w')
+        except OSError:
+            yield None
+            return
+
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield stamp_path
+
+    def _install_cached(
+        self,
+        dep_name: str,
+        dep_version: str,
+        version_config: Dict[str, Any],
+        env: Dict[str, str],
+        prefixdir: str
+    ) -> None:
+        """
+        Install a dependency from the artifact cache, or build it and cache what it installed.
+
+        Args:
+            dep_name: Dependency name
+            dep_version: Dependency version
+            version_config: Version configuration dict
+            env: Environment to build with, updated with DL_FILE_NAME
+            prefixdir: Installation prefix directory
+        """
+        cache_key = ArtifactCache.get_key(dep_name, dep_version, self.platform, version_config, env)
+
+        with ArtifactCache.prefix_lock(prefixdir) as locked:
+            if not locked:
+                self._install_dependency(dep_name, version_config, env)
+                return
+
+            # Reuse the files an identical build installed before
+            if ArtifactCache.restore(cache_key, prefixdir):
+                print(f"Restored {dep_name} {dep_version} from artifact cache")
+                return
+
+            # No other build writes the prefix while the lock is held, so the diff is ours alone
+            before = ArtifactCache.snapshot(prefixdir)
+            self._install_dependency(dep_name, version_config, env)
+            ArtifactCache.store(cache_key, prefixdir, before)
+
+    def _install_dependency(self, dep_name: str, version_config: Dict[str, Any], env: Dict[str, str]) -> None:
+        """
+        Fetch, build and install a dependency; its sub-dependencies must already be installed.
+
+        Args:
+            dep_name: Dependency name
+            version_config: Version configuration dict
+            env: Environment to build with, updated with DL_FILE_NAME
+        """
+        # Download source
+        source_type = version_config['type']
+        source_url = version_config['source']
+
+        if source_type == 'tarball':
+            filename = url_basename(source_url)
+            dest_path = os.path.join(self._workdir_str, filename)
+
+            # Verify hash if provided; fresh downloads are hashed while they are written
+            if not os.path.exists(dest_path):
+                FileDownloader.download_file(source_url, dest_path, version_config.get('hash'))
+            elif 'hash' in version_config:
+                print(f"Verifying hash for {filename}...")
+                if not FileDownloader.verify_hash(dest_path, version_config['hash']):
+                    raise ValueError(f"Hash verification failed for {filename}")
+                print("Hash verification passed")
+
+            # Add DL_FILE_NAME to environment
+            env['DL_FILE_NAME'] = filename
+
+        elif source_type == 'git':
+            # Clone git repository
+            repo_dir = os.path.join(self._workdir_str, dep_name)
+            if not os.path.exists(repo_dir):
+                GitCache.clone(source_url, repo_dir, version_config.get('tag'))
+        else:
+            raise ValueError(f"Unknown source type: {source_type}")
+
+        # Get build configuration for this platform
+        build_config = BuildConfigResolver.get_build_config(
+            version_config['build'],
+            self.platform
+        )
+
+        if not build_config:
+            print(f"No build configuration for {self.platform}, skipping...")
+            return
+
+        # Execute build commands
+        BuildRunner.execute(build_config, env, self._workdir_str, self._base_env)
 
 
 class PluginBuilder:
@@ -312,41 +492,40 @@ class PluginBuilder:
         self.plugin_name = plugin_name
         self.version = version
         self.platform = platform
-        self.workdir = Path(workdir)
+        # Keep the str form around; it is what env, downloads and subprocess take
+        self._workdir_str = os.fspath(workdir)
+        self.workdir = Path(self._workdir_str)
         self.prefixdir = prefixdir
         self.plugins_dir = plugins_dir
+        self._deps_yml_path = Path(plugins_dir) / 'dependencies.yml'
         self.nproc = nproc
+        # The process environment does not change during a build; snapshot it once
+        self._base_env = os.environ.copy()
 
         self.workdir.mkdir(parents=True, exist_ok=True)
 
-        self.env = EnvironmentManager.get_default_env(platform, str(workdir), prefixdir)
-        # Add NPROC to environment
-        self.env['NPROC'] = str(nproc)
+        self.env = EnvironmentManager.get_default_env(platform, self._workdir_str, prefixdir)
+        # Add NPROC and MAKE_JOBS to environment
+        self.env.update(EnvironmentManager.get_parallel_env(nproc))
 
-        # Load plugin configuration
-        self.config = YAMLLoader.load_plugin_config(plugin_name, plugins_dir)
+        # Load plugin configuration and the release being built
+        self.config, self.release_config = YAMLLoader.load_plugin_release(plugin_name, version, plugins_dir)
 
         # If env not in plugin config, try loading from shared env file
         if 'env' not in self.config:
             env_file_path = Path(self.plugins_dir) / 'env.yml'
             if env_file_path.exists():
                 print(f"Loading env configuration from {env_file_path}")
-                with open(env_file_path, 'r', encoding='utf-8') as f:
-                    env_data = yaml.safe_load(f)
-                    if 'env' in env_data:
-                        self.config['env'] = env_data['env']
+                env_data = load_yaml_file(env_file_path)
+                if 'env' in env_data:
+                    self.config['env'] = env_data['env']
 
         # Add global env to self.env if specified
         if 'env' in self.config:
             global_env = EnvironmentManager.merge_global_env(self.config['env'], platform)
             self.env.update(global_env)
 
-        # Find the specific release
-        self.release_config = None
-        for release in self.config.get('releases', []):
-            if release['version'] == version:
-                self.release_config = release
-                break
+        EnvironmentManager.apply_compiler_cache(self.env, self._workdir_str)
 
         if not self.release_config:
             raise ValueError(f"Version {version} not found for plugin {plugin_name}")
@@ -401,48 +580,48 @@ class PluginBuilder:
 
         # If dependencies not in plugin config, try loading from shared dependencies file
         if not full_deps_config:
-            deps_file_path = Path(self.plugins_dir) / 'dependencies.yml'
+            deps_file_path = self._deps_yml_path
             if deps_file_path.exists():
                 print(f"Loading dependencies from {deps_file_path}")
-                with open(deps_file_path, 'r', encoding='utf-8') as f:
-                    deps_data = yaml.safe_load(f)
-                    full_deps_config = deps_data.get('dependencies', {})
-
-        # Build each dependency
-        dep_builder = DependencyBuilder(
-            str(self.workdir),
-            self.prefixdir,
-            self.platform,
-            self.nproc,
-            parent_config=self.config
-        )
+                deps_data = load_yaml_file(deps_file_path)
+                full_deps_config = deps_data.get('dependencies', {})
+
         for dep in dep_list:
-            dep_name = dep['name']
-            dep_version = dep['version']
+            if dep['name'] not in full_deps_config:
+                raise ValueError(f"Dependency {dep['name']} not found in dependencies section")
 
-            if dep_name not in full_deps_config:
-                raise ValueError(f"Dependency {dep_name} not found in dependencies section")
+        deps_by_name = {dep['name']: dep for dep in dep_list}
 
+        def build_one(dep_name: str, jobs: int) -> None:
+            # Each task gets its own builder so env and cycle detection state are not shared
+            dep_builder = DependencyBuilder(
+                self._workdir_str,
+                self.prefixdir,
+                self.platform,
+                jobs,
+                parent_config=self.config
+            )
             dep_builder.build_dependency(
                 dep_name,
-                dep_version,
+                deps_by_name[dep_name]['version'],
                 full_deps_config[dep_name]
             )
 
+        run_dependency_graph(dep_list, build_one, self.nproc)
+
     def _download_source(self) -> None:
         """Download plugin source code."""
         source_type = self.release_config['type']
         source_url = self.release_config['source']
 
         if source_type == 'tarball':
-            filename = source_url.split('/')[-1]
+            filename = url_basename(source_url)
             dest_path = self.workdir / filename
 
+            # Verify hash if provided; fresh downloads are hashed while they are written
             if not dest_path.exists():
-                FileDownloader.download_file(source_url, str(dest_path))
-
-            # Verify hash if provided
-            if 'hash' in self.release_config:
+                FileDownloader.download_file(source_url, str(dest_path), self.release_config.get('hash'))
+            elif 'hash' in self.release_config:
                 print(f"Verifying hash for {filename}...")
                 if not FileDownloader.verify_hash(str(dest_path), self.release_config['hash']):
                     raise ValueError(f"Hash verification failed for {filename}")
@@ -455,17 +634,7 @@ class PluginBuilder:
             # Clone git repository
             repo_dir = self.workdir / self.plugin_name
             if not repo_dir.exists():
-                print(f"Cloning {source_url}...")
-                subprocess.run(
-                    ['git', 'clone', source_url, str(repo_dir)],
-                    check=True
-                )
-                if 'tag' in self.release_config:
-                    subprocess.run(
-                        ['git', 'checkout', self.release_config['tag']],
-                        cwd=str(repo_dir),
-                        check=True
-                    )
+                GitCache.clone(source_url, str(repo_dir), self.release_config.get('tag'))
         else:
             raise ValueError(f"Unknown source type: {source_type}")
 
@@ -480,9 +649,7 @@ class PluginBuilder:
             raise ValueError(f"No build configuration for platform {self.platform}")
 
         # Execute build commands
-        dep_builder = DependencyBuilder(str(self.workdir), self.prefixdir, self.platform, self.nproc)
-        dep_builder.env = self.env  # Use same environment
-        dep_builder._execute_build(build_config)
+        BuildRunner.execute(build_config, self.env, self._workdir_str, self._base_env)
 
     def _collect_artifacts(self) -> List[str]:
         """
@@ -499,11 +666,20 @@ class PluginBuilder:
         artifact_patterns = BuildConfigResolver.get_artifacts(artifacts_config, self.platform)
 
         artifacts = []
+        dir_entries = {}  # Directory listing per parent, read once with os.scandir
         for pattern in artifact_patterns:
             # Substitute variables in pattern
             artifact_path = EnvironmentManager.substitute_vars(pattern, self.env)
 
-            if not Path(artifact_path).exists():
+            parent, name = os.path.split(os.path.normpath(artifact_path))
+            if parent not in dir_entries:
+                try:
+                    with os.scandir(parent or '.') as it:
+                        dir_entries[parent] = {entry.name for entry in it}
+                except (FileNotFoundError, NotADirectoryError):
+                    dir_entries[parent] = set()
+
+            if name not in dir_entries[parent]:
                 raise FileNotFoundError(f"Artifact not found: {artifact_path}")
 
             artifacts.append(artifact_path)
@@ -511,6 +687,33 @@ class PluginBuilder:
         return artifacts
 
 
+def get_default_nproc() -> int:
+    """
+    Get the number of CPUs this process may actually use.
+
+    Honors the CPU affinity mask and, on Linux, the cgroup v2 CPU quota,
+    so constrained CI containers are not oversubscribed.
+
+    Returns:
+        Number of parallel jobs
+    """
+    try:
+        nproc = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS
+        nproc = os.cpu_count() or 1
+
+    try:
+        with open('/sys/fs/cgroup/cpu.max', 'r', encoding='utf-8') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            nproc = min(nproc, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+
+    return nproc
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description='Build VapourSynth plugin')
@@ -528,8 +731,8 @@ def main():
     if args.nproc:
         nproc = args.nproc
     else:
-        # Default to CPU count
-        nproc = os.cpu_count() or 1
+        # Default to the CPUs available to this process
+        nproc = get_default_nproc()
 
     try:
         builder = PluginBuilder(
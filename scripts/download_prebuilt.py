@@ -5,42 +5,116 @@ Used in main build workflow to fetch pre-built dependencies.
 """
 
 import argparse
+import functools
 import json
 import os
+import shutil
+import signal
 import subprocess
 import sys
-import urllib.request
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def get_latest_release(repo: str, tag_prefix: str) -> dict:
+def _get_release_cache_path(repo: str) -> Path:
+    """Get the on-disk cache file for a repository's releases list."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return Path(cache_home) / 'vsbuild' / f"releases-{repo.replace('/', '_')}.json"
+
+
+@functools.lru_cache(maxsize=8)
+def fetch_releases(repo: str) -> list:
     """
-    Get the latest release matching a tag prefix.
+    Fetch the releases list of a repository.
+
+    The response is cached in-process, and on disk together with its ETag so
+    that later runs send a conditional request and reuse the cached body on
+    HTTP 304.
 
     Args:
         repo: Repository in format 'owner/repo'
-        tag_prefix: Tag prefix to filter (e.g., 'toolchains-', 'vapoursynth-')
 
     Returns:
-        Release information dict
+        List of release information dicts, newest first
+
+    Raises:
+        RuntimeError: If the releases cannot be fetched
     """
+    # Deferred so --help and argument errors do not pay for the HTTP stack
+    import urllib.error
+    import urllib.request
+
     api_url = f"https://api.github.com/repos/{repo}/releases"
+    cache_path = _get_release_cache_path(repo)
+
+    cached = None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    request = urllib.request.Request(api_url)
+    if cached and cached.get('etag'):
+        request.add_header('If-None-Match', cached['etag'])
 
     print(f"Fetching releases from {repo}...", file=sys.stderr)
 
     try:
-        with urllib.request.urlopen(api_url) as response:
-            releases = json.loads(response.read())
+        with urllib.request.urlopen(request) as response:
+            body = response.read()
+            etag = response.headers.get('ETag')
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            print("Releases not modified, using cached list", file=sys.stderr)
+            return cached['releases']
+        raise RuntimeError(f"Error fetching releases: {e}") from e
     except Exception as e:
-        print(f"Error fetching releases: {e}", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError(f"Error fetching releases: {e}") from e
+
+    releases = json.loads(body)
+
+    if etag:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'etag': etag, 'releases': releases}, f)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+
+    return releases
+
+
+def filter_releases(releases: list, tag_prefix: str) -> list:
+    """Return the releases whose tag starts with tag_prefix, preserving order."""
+    return [r for r in releases if r['tag_name'].startswith(tag_prefix)]
+
+
+def get_latest_release(repo: str, tag_prefix: str) -> dict:
+    """
+    Get the latest release matching a tag prefix.
 
-    # Filter releases by tag prefix
-    matching_releases = [r for r in releases if r['tag_name'].startswith(tag_prefix)]
+    Args:
+        repo: Repository in format 'owner/repo'
+        tag_prefix: Tag prefix to filter (e.g., 'toolchains-', 'vapoursynth-')
+
+    Returns:
+        Release information dict
+
+    Raises:
+        RuntimeError: If no release matches
+    """
+    matching_releases = filter_releases(fetch_releases(repo), tag_prefix)
 
     if not matching_releases:
-        print(f"No releases found with tag prefix '{tag_prefix}'", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError(f"No releases found with tag prefix '{tag_prefix}'")
 
     # Return the most recent one
     latest = matching_releases[0]
@@ -56,19 +130,25 @@ def download_asset(asset_url: str, dest_path: str) -> None:
     Args:
         asset_url: URL to download from
         dest_path: Destination file path
+
+    Raises:
+        RuntimeError: If the download fails
     """
     print(f"Downloading {asset_url}...", file=sys.stderr)
     print(f"  -> {dest_path}", file=sys.stderr)
 
+    import urllib.request
+
     dest_path_obj = Path(dest_path)
     dest_path_obj.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        urllib.request.urlretrieve(asset_url, dest_path)
+        request = urllib.request.Request(asset_url, headers={'Accept-Encoding': 'identity'})
+        with urllib.request.urlopen(request, timeout=60) as response, open(dest_path, 'wb') as f:
+            shutil.copyfileobj(response, f, 1 << 20)
         print(f"Downloaded successfully", file=sys.stderr)
     except Exception as e:
-        print(f"Error downloading: {e}", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError(f"Error downloading: {e}") from e
 
 
 def extract_archive(archive_path: str, dest_dir: str) -> None:
@@ -78,6 +158,9 @@ def extract_archive(archive_path: str, dest_dir: str) -> None:
     Args:
         archive_path: Path to archive file
         dest_dir: Destination directory
+
+    Raises:
+        RuntimeError: If the archive format is not supported
     """
     print(f"Extracting {archive_path}...", file=sys.stderr)
 
@@ -87,11 +170,26 @@ def extract_archive(archive_path: str, dest_dir: str) -> None:
     archive_path_obj = Path(archive_path)
 
     if archive_path_obj.suffix in ['.gz', '.tgz'] or archive_path.endswith('.tar.gz'):
-        # Extract tar.gz
-        subprocess.run(
-            ['tar', 'xzf', str(archive_path), '-C', str(dest_dir)],
-            check=True
-        )
+        pigz = shutil.which('pigz')
+        if pigz:
+            # Inflate with pigz so decompression does not bottleneck on tar's builtin gzip
+            with subprocess.Popen([pigz, '-dc', str(archive_path)], stdout=subprocess.PIPE) as inflate:
+                with subprocess.Popen(['tar', 'xf', '-', '-C', str(dest_dir)], stdin=inflate.stdout) as untar:
+                    # tar holds the only read end, so pigz gets SIGPIPE if tar exits early
+                    inflate.stdout.close()
+            # pigz dies of SIGPIPE when tar fails; blame tar unless pigz failed on its own
+            if inflate.returncode not in (0, -signal.SIGPIPE):
+                raise subprocess.CalledProcessError(inflate.returncode, inflate.args)
+            if untar.returncode:
+                raise subprocess.CalledProcessError(untar.returncode, untar.args)
+            if inflate.returncode:
+                raise subprocess.CalledProcessError(inflate.returncode, inflate.args)
+        else:
+            # Extract tar.gz
+            subprocess.run(
+                ['tar', 'xzf', str(archive_path), '-C', str(dest_dir)],
+                check=True
+            )
     elif archive_path_obj.suffix == '.7z':
         # Extract 7z
         subprocess.run(
@@ -99,12 +197,43 @@ def extract_archive(archive_path: str, dest_dir: str) -> None:
             check=True
         )
     else:
-        print(f"Unsupported archive format: {archive_path}", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError(f"Unsupported archive format: {archive_path}")
 
     print(f"Extracted to {dest_dir}", file=sys.stderr)
 
 
+def install_asset(release: dict, asset: dict, dest_dir: str) -> None:
+    """
+    Download and extract a release asset unless it is already extracted.
+
+    A stamp recording the release tag and asset id is written next to the
+    extracted files, so a later run for the same release skips both steps.
+
+    Args:
+        release: Release information dict
+        asset: Asset information dict from the release
+        dest_dir: Destination directory
+    """
+    stamp_path = Path(dest_dir) / f".{asset['name']}.stamp"
+    stamp = f"{release['tag_name']} {asset['id']}"
+
+    try:
+        if stamp_path.read_text(encoding='utf-8') == stamp:
+            print(f"{asset['name']} from {release['tag_name']} is already extracted, skipping...", file=sys.stderr)
+            return
+    except OSError:
+        pass
+
+    # Download
+    archive_path = Path(dest_dir) / asset['name']
+    download_asset(asset['browser_download_url'], str(archive_path))
+
+    # Extract
+    extract_archive(str(archive_path), dest_dir)
+
+    stamp_path.write_text(stamp, encoding='utf-8')
+
+
 def download_toolchain(repo: str, toolchain_type: str, dest_dir: str) -> str:
     """
     Download and extract a toolchain.
@@ -116,6 +245,9 @@ def download_toolchain(repo: str, toolchain_type: str, dest_dir: str) -> str:
 
     Returns:
         Path to extracted toolchain
+
+    Raises:
+        RuntimeError: If the release or asset cannot be found or downloaded
     """
     release = get_latest_release(repo, 'toolchains-')
 
@@ -126,8 +258,7 @@ def download_toolchain(repo: str, toolchain_type: str, dest_dir: str) -> str:
     }
 
     if toolchain_type not in asset_name_patterns:
-        print(f"Unknown toolchain type: {toolchain_type}", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError(f"Unknown toolchain type: {toolchain_type}")
 
     pattern = asset_name_patterns[toolchain_type]
 
@@ -139,15 +270,9 @@ def download_toolchain(repo: str, toolchain_type: str, dest_dir: str) -> str:
             break
 
     if not asset:
-        print(f"Asset not found: {pattern}", file=sys.stderr)
-        sys.exit(1)
-
-    # Download
-    archive_path = Path(dest_dir) / asset['name']
-    download_asset(asset['browser_download_url'], str(archive_path))
+        raise RuntimeError(f"Asset not found: {pattern}")
 
-    # Extract
-    extract_archive(str(archive_path), dest_dir)
+    install_asset(release, asset, dest_dir)
 
     # Return toolchain path
     if toolchain_type == 'musl':
@@ -168,6 +293,9 @@ def download_vapoursynth(repo: str, version: str, platform: str, dest_dir: str)
 
     Returns:
         Path to extracted VapourSynth
+
+    Raises:
+        RuntimeError: If the release or asset cannot be found or downloaded
     """
     release = get_latest_release(repo, f'vapoursynth-{version}')
 
@@ -179,8 +307,7 @@ def download_vapoursynth(repo: str, version: str, platform: str, dest_dir: str)
     }
 
     if platform not in asset_name_patterns:
-        print(f"Unknown platform: {platform}", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError(f"Unknown platform: {platform}")
 
     pattern = asset_name_patterns[platform]
 
@@ -192,15 +319,9 @@ def download_vapoursynth(repo: str, version: str, platform: str, dest_dir: str)
             break
 
     if not asset:
-        print(f"Asset not found: {pattern}", file=sys.stderr)
-        sys.exit(1)
+        raise RuntimeError(f"Asset not found: {pattern}")
 
-    # Download
-    archive_path = Path(dest_dir) / asset['name']
-    download_asset(asset['browser_download_url'], str(archive_path))
-
-    # Extract
-    extract_archive(str(archive_path), dest_dir)
+    install_asset(release, asset, dest_dir)
 
     return str(Path(dest_dir))
 
@@ -211,8 +332,9 @@ def main():
     parser.add_argument(
         '--type',
         choices=['toolchain', 'vapoursynth'],
+        action='append',
         required=True,
-        help='Type of package to download'
+        help='Type of package to download (repeat to download several concurrently)'
     )
     parser.add_argument(
         '--repo',
@@ -239,13 +361,38 @@ def main():
     )
 
     args = parser.parse_args()
+    types = list(dict.fromkeys(args.type))
+
+    if 'toolchain' in types and not args.toolchain_type:
+        print("Error: --toolchain-type is required for toolchain downloads", file=sys.stderr)
+        sys.exit(1)
 
-    if args.type == 'toolchain':
-        if not args.toolchain_type:
-            print("Error: --toolchain-type is required for toolchain downloads", file=sys.stderr)
-            sys.exit(1)
+    if 'vapoursynth' in types and (not args.version or not args.platform):
+        print("Error: --version and --platform are required for VapourSynth downloads", file=sys.stderr)
+        sys.exit(1)
 
-        toolchain_path = download_toolchain(args.repo, args.toolchain_type, args.dest)
+    try:
+        # Every package comes from the same releases list; fetch it once up front
+        fetch_releases(args.repo)
+
+        # Downloads are network bound, so fetch the requested packages concurrently
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {}
+            if 'toolchain' in types:
+                futures['toolchain'] = executor.submit(
+                    download_toolchain, args.repo, args.toolchain_type, args.dest
+                )
+            if 'vapoursynth' in types:
+                futures['vapoursynth'] = executor.submit(
+                    download_vapoursynth, args.repo, args.version, args.platform, args.dest
+                )
+            paths = {name: future.result() for name, future in futures.items()}
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    if 'toolchain' in paths:
+        toolchain_path = paths['toolchain']
         print(f"\nToolchain installed to: {toolchain_path}")
         print(f"\nTo use this toolchain, run:")
         print(f"  export PATH=\"{toolchain_path}/bin:$PATH\"")
@@ -257,12 +404,8 @@ def main():
             print(f"  export CC=x86_64-unknown-linux-gnu-gcc")
             print(f"  export CXX=x86_64-unknown-linux-gnu-g++")
 
-    elif args.type == 'vapoursynth':
-        if not args.version or not args.platform:
-            print("Error: --version and --platform are required for VapourSynth downloads", file=sys.stderr)
-            sys.exit(1)
-
-        vs_path = download_vapoursynth(args.repo, args.version, args.platform, args.dest)
+    if 'vapoursynth' in paths:
+        vs_path = paths['vapoursynth']
         print(f"\nVapourSynth installed to: {vs_path}")
 
 
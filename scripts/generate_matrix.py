@@ -6,91 +6,101 @@ plugin YAML configurations.
 """
 
 import argparse
-import json
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 # Add scripts directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+import jsonio
 from utils import YAMLLoader, PlatformMatcher, BuildConfigResolver
 
 
-def generate_build_matrix(
-    plugins: List[str],
-    plugins_dir: str = 'plugins'
-) -> List[Dict[str, str]]:
-    """
-    Generate build matrix entries for specified plugins.
+# GitHub Actions runner for each platform
+RUNNERS = {
+    'linux-x86_64-glibc': 'ubuntu-24.04',
+    'linux-x86_64-musl': 'ubuntu-24.04',
+    'darwin-x86_64': 'macos-15-intel',  # Intel
+    'darwin-aarch64': 'macos-15',  # Apple Silicon (M1/M2/M3)
+}
 
-    Args:
-        plugins: List of plugin names to build (empty = all plugins)
-        plugins_dir: Directory containing plugin configurations
 
-    Returns:
-        List of matrix entries with 'plugin', 'version', and 'platform' keys
+@dataclass(frozen=True, slots=True)
+class BuildEntry:
+    """Build matrix entry."""
+
+    plugin: str
+    version: str
+    platform: str
+    runner: str
+
+
+@dataclass(frozen=True, slots=True)
+class TestEntry:
+    """Test matrix entry."""
+
+    plugin: str
+    version: str
+    platform: str
+    test_name: str
+    runner: str
+
+
+def entry_to_dict(entry: Any) -> Dict[str, str]:
     """
-    matrix_entries = []
+    Convert a matrix entry to the dict written to the matrix JSON.
 
-    # Get all plugins if none specified
-    if not plugins:
-        plugins = YAMLLoader.get_all_plugins(plugins_dir)
+    Used as the JSON encoder's default hook so entries are only turned into
+    dicts while they are being encoded.
 
-    print(f"Generating build matrix for {len(plugins)} plugin(s)...", file=sys.stderr)
+    Args:
+        entry: BuildEntry or TestEntry
 
-    for plugin_name in plugins:
-        try:
-            config = YAMLLoader.load_plugin_config(plugin_name, plugins_dir)
-        except FileNotFoundError as e:
-            print(f"Warning: {e}", file=sys.stderr)
-            continue
+    Returns:
+        Dict with the entry's fields in declaration order
+    """
+    if isinstance(entry, (BuildEntry, TestEntry)):
+        return {name: getattr(entry, name) for name in entry.__slots__}
+    raise TypeError(f"Object of type {type(entry).__name__} is not JSON serializable")
 
-        # Process each release version
-        releases = config.get('releases', [])
-        for release in releases:
-            version = release['version']
-            build_config = release.get('build', {})
 
-            # Find all platforms supported by this release
-            supported_platforms = set()
-            for pattern in build_config.keys():
-                matching = PlatformMatcher.get_matching_platforms(pattern)
-                supported_platforms.update(matching)
+def get_supported_platforms(build_config: Dict[str, Any]) -> frozenset:
+    """
+    Get all platforms a release's build configuration covers.
 
-            # Create matrix entry for each supported platform
-            for platform in sorted(supported_platforms):
-                matrix_entries.append({
-                    'plugin': plugin_name,
-                    'version': version,
-                    'platform': platform
-                })
+    Args:
+        build_config: Build section of a release, keyed by platform pattern
 
-    print(f"Generated {len(matrix_entries)} matrix entries", file=sys.stderr)
-    return matrix_entries
+    Returns:
+        Set of platform names
+    """
+    return frozenset().union(*map(PlatformMatcher.get_matching_platforms, build_config))
 
 
-def generate_test_matrix(
+def generate_matrices(
     plugins: List[str],
     plugins_dir: str = 'plugins'
-) -> List[Dict[str, Any]]:
+) -> Tuple[List[BuildEntry], List[TestEntry]]:
     """
-    Generate test matrix entries for specified plugins.
+    Generate build and test matrix entries for specified plugins in one pass.
 
     Args:
-        plugins: List of plugin names to test (empty = all plugins)
+        plugins: List of plugin names (empty = all plugins)
         plugins_dir: Directory containing plugin configurations
 
     Returns:
-        List of test matrix entries with plugin, version, platform, and test info
+        Tuple of (build entries, test entries)
     """
-    matrix_entries = []
+    build_entries = []
+    test_entries = []
 
     # Get all plugins if none specified
     if not plugins:
         plugins = YAMLLoader.get_all_plugins(plugins_dir)
 
-    print(f"Generating test matrix for {len(plugins)} plugin(s)...", file=sys.stderr)
+    print(f"Generating build and test matrices for {len(plugins)} plugin(s)...", file=sys.stderr)
 
     for plugin_name in plugins:
         try:
@@ -99,10 +109,7 @@ def generate_test_matrix(
             print(f"Warning: {e}", file=sys.stderr)
             continue
 
-        # Get tests if any
         tests = config.get('tests', [])
-        if not tests:
-            continue
 
         # Process each release version
         releases = config.get('releases', [])
@@ -111,24 +118,17 @@ def generate_test_matrix(
             build_config = release.get('build', {})
 
             # Find all platforms supported by this release
-            supported_platforms = set()
-            for pattern in build_config.keys():
-                matching = PlatformMatcher.get_matching_platforms(pattern)
-                supported_platforms.update(matching)
+            supported_platforms = get_supported_platforms(build_config)
 
-            # Create test matrix entry for each (plugin, version, platform, test)
+            # Create build entry and test entries for each supported platform
             for platform in sorted(supported_platforms):
+                runner = get_runner_for_platform(platform)
+                build_entries.append(BuildEntry(plugin_name, version, platform, runner))
                 for test in tests:
-                    test_name = test['name']
-                    matrix_entries.append({
-                        'plugin': plugin_name,
-                        'version': version,
-                        'platform': platform,
-                        'test_name': test_name
-                    })
+                    test_entries.append(TestEntry(plugin_name, version, platform, test['name'], runner))
 
-    print(f"Generated {len(matrix_entries)} test matrix entries", file=sys.stderr)
-    return matrix_entries
+    print(f"Generated {len(build_entries)} build and {len(test_entries)} test matrix entries", file=sys.stderr)
+    return build_entries, test_entries
 
 
 def get_runner_for_platform(platform: str) -> str:
@@ -141,30 +141,10 @@ def get_runner_for_platform(platform: str) -> str:
     Returns:
         GitHub Actions runner label
     """
-    if platform.startswith('linux'):
-        return 'ubuntu-24.04'
-    elif platform.startswith('darwin'):
-        if 'aarch64' in platform:
-            return 'macos-15'  # Apple Silicon (M1/M2/M3)
-        else:
-            return 'macos-15-intel'  # Intel
-    else:
-        raise ValueError(f"Unknown platform: {platform}")
-
-
-def add_runner_to_matrix(matrix_entries: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    """
-    Add 'runner' field to each matrix entry.
-
-    Args:
-        matrix_entries: List of matrix entries
-
-    Returns:
-        Matrix entries with 'runner' field added
-    """
-    for entry in matrix_entries:
-        entry['runner'] = get_runner_for_platform(entry['platform'])
-    return matrix_entries
+    try:
+        return RUNNERS[platform]
+    except KeyError:
+        raise ValueError(f"Unknown platform: {platform}") from None
 
 
 def main():
@@ -198,24 +178,21 @@ def main():
 
     args = parser.parse_args()
 
-    # Generate matrix based on type
-    if args.type == 'build':
-        matrix_entries = generate_build_matrix(args.plugins, args.plugins_dir)
-    else:  # test
-        matrix_entries = generate_test_matrix(args.plugins, args.plugins_dir)
-
-    # Add runner information
-    matrix_entries = add_runner_to_matrix(matrix_entries)
+    # Both matrices come from the same traversal; keep the requested one
+    build_entries, test_entries = generate_matrices(args.plugins, args.plugins_dir)
+    matrix_entries = build_entries if args.type == 'build' else test_entries
 
     # Output in requested format
+    # Encode straight to stdout instead of building the whole string first
     if args.output == 'json':
-        print(json.dumps(matrix_entries, indent=2))
+        jsonio.dump(matrix_entries, sys.stdout, indent=True, default=entry_to_dict)
     elif args.output == 'github':
         # GitHub Actions matrix format
         matrix = {'include': matrix_entries}
         # Output in format that can be set as GitHub Actions output
         # Using the new format for multiline outputs
-        print(json.dumps(matrix))
+        jsonio.dump(matrix, sys.stdout, default=entry_to_dict)
+    sys.stdout.write('\n')
 
 
 if __name__ == '__main__':
@@ -4,34 +4,25 @@
 from __future__ import annotations
 
 import argparse
-import json
 import os
 from pathlib import Path
 from typing import Dict, List, Sequence, Tuple
 
+import jsonio
+
 
 Record = Dict[str, str]
 Key = Tuple[str, str, str]
 
 
 def _load_records(directory: Path) -> List[Record]:
-    if not directory.exists():
-        return []
-    records: List[Record] = []
-    for file_path in directory.rglob("*.json"):
-        try:
-            with file_path.open("r", encoding="utf-8") as fh:
-                records.append(json.load(fh))
-        except Exception as exc:  # pragma: no cover - best-effort logging only
-            print(f"Warning: unable to parse {file_path}: {exc}")
-    return records
+    return jsonio.load_records(directory)
 
 
 def _load_base_test_matrix(path: Path) -> Sequence[Record]:
     if not path.exists():
         return []
-    with path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+    return jsonio.loads(path.read_bytes())
 
 
 def parse_args() -> argparse.Namespace:
@@ -90,38 +81,32 @@ def main() -> None:
         if entries and all(item.get("status") == "success" for item in entries)
     }
 
-    release_candidates: List[Dict[str, str]] = []
-    skipped_due_to_tests: List[Key] = []
-
-    for key, status in build_status.items():
-        if status != "success":
-            continue
-        requires_tests = key in test_required_keys
-        if requires_tests and key not in test_pass_keys:
-            skipped_due_to_tests.append(key)
-            continue
-        plugin, version, platform = key
-        release_candidates.append(
-            {"plugin": plugin, "version": version, "platform": platform}
-        )
+    successful_builds = {key for key, status in build_status.items() if status == "success"}
+
+    # Builds with tests must have passed all of them; the rest release as-is
+    needs_tests = successful_builds & test_required_keys
+    skipped_due_to_tests = needs_tests - test_pass_keys
+    releasable = (successful_builds - test_required_keys) | (needs_tests & test_pass_keys)
+
+    # Keys are (plugin, version, platform) tuples, so sorting them yields the
+    # matrix order directly
+    matrix_entries: List[Dict[str, str]] = [
+        {"plugin": plugin, "version": version, "platform": platform}
+        for plugin, version, platform in sorted(releasable)
+    ]
 
     if skipped_due_to_tests:
         print("Skipping release for the following platform(s) due to missing/failed tests:")
         for plugin, version, platform in sorted(skipped_due_to_tests):
             print(f"  - {plugin} {version} ({platform})")
 
-    matrix_entries = sorted(
-        release_candidates,
-        key=lambda entry: (entry["plugin"], entry["version"], entry["platform"]),
-    )
-
     github_matrix = {"include": matrix_entries}
     print("Release matrix candidates:")
-    print(json.dumps(github_matrix, indent=2))
+    print(jsonio.dumps(github_matrix, indent=True))
 
+    output = f"has-releases={'true' if matrix_entries else 'false'}\nmatrix={jsonio.dumps(github_matrix)}\n"
     with args.output.open("a", encoding="utf-8") as fh:
-        fh.write(f"has-releases={'true' if matrix_entries else 'false'}\n")
-        fh.write("matrix=" + json.dumps(github_matrix) + "\n")
+        fh.write(output)
 
 
 if __name__ == "__main__":
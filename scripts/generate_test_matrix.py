@@ -4,50 +4,42 @@
 from __future__ import annotations
 
 import argparse
-import json
 import os
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence, Tuple
 
+import jsonio
+
 
 MatrixEntry = Dict[str, str]
 
+# (plugin, version, platform) key of a matrix entry or build record
+_entry_key = itemgetter("plugin", "version", "platform")
+
 
 def _load_json_file(path: Path) -> Sequence[MatrixEntry]:
     if not path.exists():
         return []
-    with path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+    return jsonio.loads(path.read_bytes())
 
 
 def _collect_successful_builds(build_dir: Path) -> Iterable[Tuple[str, str, str]]:
-    if not build_dir.exists():
-        return []
-
-    success = []
-    for file_path in build_dir.rglob("*.json"):
-        try:
-            with file_path.open("r", encoding="utf-8") as fh:
-                record = json.load(fh)
-        except Exception as exc:  # pragma: no cover - diagnostic output only
-            print(f"Warning: unable to parse {file_path}: {exc}")
-            continue
-
-        if record.get("status") == "success":
-            success.append(
-                (record["plugin"], record["version"], record["platform"])
-            )
-    return success
+    return [
+        _entry_key(record)
+        for record in jsonio.load_records(build_dir)
+        if record.get("status") == "success"
+    ]
 
 
 def write_outputs(matrix: List[MatrixEntry], output_path: Path) -> None:
     github_matrix = {"include": matrix}
     print("Filtered test matrix:")
-    print(json.dumps(github_matrix, indent=2))
+    print(jsonio.dumps(github_matrix, indent=True))
 
+    output = f"has-tests={'true' if matrix else 'false'}\nmatrix={jsonio.dumps(github_matrix)}\n"
     with output_path.open("a", encoding="utf-8") as fh:
-        fh.write(f"has-tests={'true' if matrix else 'false'}\n")
-        fh.write("matrix=" + json.dumps(github_matrix) + "\n")
+        fh.write(output)
 
 
 def parse_args() -> argparse.Namespace:
@@ -71,12 +63,7 @@ def main() -> None:
     success_keys = set(_collect_successful_builds(args.build_results_dir))
     print(f"Found {len(success_keys)} successful build entries")
 
-    filtered = [
-        entry
-        for entry in base_matrix
-        if (entry["plugin"], entry["version"], entry["platform"])
-        in success_keys
-    ]
+    filtered = [entry for entry in base_matrix if _entry_key(entry) in success_keys]
 
     if not args.output:
         raise SystemExit("Output path is required (set --output or GITHUB_OUTPUT)")
@@ -0,0 +1,143 @@
+"""
+JSON encode/decode helpers using orjson when available, the stdlib otherwise,
+and readers/writers for build and test result records.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Result files read_records understands
+RECORD_SUFFIXES = (".json", ".jsonl", ".jsonl.zst")
+
+
+def loads(data: str | bytes) -> Any:
+    """Decode a JSON document from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Encode obj; indent=True pretty-prints with two spaces."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+    if indent:
+        return json.dumps(obj, indent=2, default=default)
+    return json.dumps(obj, separators=(",", ":"), default=default)
+
+
+def dump(obj: Any, fp: TextIO, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> None:
+    """
+    Encode obj and write it to the text stream fp.
+
+    orjson's bytes go straight to the underlying binary buffer when there is
+    one; the stdlib encoder writes to fp chunk by chunk.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        data = orjson.dumps(obj, default=default, option=option)
+        buffer = getattr(fp, "buffer", None)
+        if buffer is None:
+            fp.write(data.decode("utf-8"))
+        else:
+            # Text already written to fp must come first
+            fp.flush()
+            buffer.write(data)
+        return
+    if indent:
+        json.dump(obj, fp, indent=2, default=default)
+    else:
+        json.dump(obj, fp, separators=(",", ":"), default=default)
+
+
+def iter_record_files(directory: str | os.PathLike) -> Iterator[str]:
+    """Yield the paths of all result files below directory."""
+    # os.scandir avoids a Path object and a stat call per entry
+    stack = [os.fspath(directory)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(RECORD_SUFFIXES):
+                    yield entry.path
+
+
+def read_records(path: str | os.PathLike) -> List[Any]:
+    """
+    Read result records from a .json file or a .jsonl / .jsonl.zst shard.
+
+    Shards hold one record per line. Compressed shards may contain several
+    concatenated zstd frames, one per append.
+    """
+    path = os.fspath(path)
+    if path.endswith(".jsonl.zst"):
+        import zstandard
+
+        with open(path, "rb") as fh:
+            reader = zstandard.ZstdDecompressor().stream_reader(fh, read_across_frames=True)
+            with io.TextIOWrapper(reader, encoding="utf-8") as text:
+                return [loads(line) for line in text if line.strip()]
+    with open(path, "rb") as fh:
+        if path.endswith(".jsonl"):
+            return [loads(line) for line in fh if line.strip()]
+        return [loads(fh.read())]
+
+
+def load_records(directory: str | os.PathLike) -> List[Any]:
+    """
+    Read every result file below directory.
+
+    Files that cannot be parsed are reported and skipped.
+    """
+    if not os.path.exists(directory):
+        return []
+    # Thousands of tiny files: overlap the per-file open/read latency
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        batches = pool.map(_read_records_or_warn, iter_record_files(directory))
+        return [record for records in batches for record in records]
+
+
+def _read_records_or_warn(path: str) -> List[Any]:
+    try:
+        return read_records(path)
+    except Exception as exc:  # pragma: no cover - best-effort logging only
+        print(f"Warning: unable to parse {path}: {exc}")
+        return []
+
+
+def write_record(path: Path, data: Any) -> None:
+    """
+    Write a result record to a .json file, or append it to a .jsonl / .jsonl.zst shard.
+
+    Appends hold an exclusive lock so concurrent writers do not interleave.
+    """
+    import fcntl
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.name.endswith(".jsonl.zst"):
+        import zstandard
+
+        # Each append is a complete frame; readers decode across frames
+        frame = zstandard.ZstdCompressor().compress((dumps(data) + "\n").encode("utf-8"))
+        with path.open("ab") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            fh.write(frame)
+    elif path.suffix == ".jsonl":
+        with path.open("a", encoding="utf-8") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            fh.write(dumps(data) + "\n")
+    else:
+        path.write_text(dumps(data), encoding="utf-8")
@@ -3,9 +3,9 @@
 
 from __future__ import annotations
 
-import json
 import os
 from pathlib import Path
+import jsonio
 
 
 def _get_env(name: str) -> str:
@@ -24,9 +24,8 @@ def main() -> None:
         "status": _get_env("BUILD_STATUS"),
     }
     output_path = Path(_get_env("RESULT_FILE"))
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(data), encoding="utf-8")
-    print("Recorded build result:", json.dumps(data))
+    jsonio.write_record(output_path, data)
+    print("Recorded build result:", jsonio.dumps(data))
 
 
 if __name__ == "__main__":
@@ -3,10 +3,14 @@
 
 from __future__ import annotations
 
-import json
 import os
 import re
 from pathlib import Path
+import jsonio
+
+
+# Characters not allowed in result file names
+_SLUG_RE = re.compile(r"[^A-Za-z0-9._-]+")
 
 
 def _get_env(name: str, default: str | None = None) -> str:
@@ -21,7 +25,7 @@ def _default_result_file() -> Path:
     version = _get_env("VERSION")
     platform = _get_env("PLATFORM")
     test_name = _get_env("TEST_NAME")
-    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", test_name)
+    slug = _SLUG_RE.sub("_", test_name)
     return Path("test-status") / f"{plugin}-{version}-{platform}-{slug}.json"
 
 
@@ -37,9 +41,8 @@ def main() -> None:
         "status": os.environ.get("TEST_STATUS", ""),
     }
 
-    result_file.parent.mkdir(parents=True, exist_ok=True)
-    result_file.write_text(json.dumps(payload), encoding="utf-8")
-    print("Recorded test result:", json.dumps(payload))
+    jsonio.write_record(result_file, payload)
+    print("Recorded test result:", jsonio.dumps(payload))
     print(f"Result written to: {result_file}")
 
     if result_path_file:
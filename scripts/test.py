@@ -18,7 +18,8 @@ sys.path.insert(0, str(Path(__file__).parent))
 from utils import (
     YAMLLoader,
     EnvironmentManager,
-    create_attachment_files
+    create_attachment_files,
+    split_command
 )
 
 
@@ -158,24 +159,19 @@ class PluginTester:
             cmd = EnvironmentManager.substitute_vars(cmd, self.env)
             cwd = EnvironmentManager.substitute_vars(cwd, self.env)
 
-            print(f"[{cwd}]$ {cmd}")
+            # Flush so the header is written before the command's own output
+            print(f"[{cwd}]$ {cmd}", flush=True)
 
-            # Execute command
+            # Execute command, streaming its output straight to ours and
+            # skipping the intermediate shell when it is not needed
+            argv = split_command(cmd)
             try:
                 result = subprocess.run(
-                    cmd,
-                    shell=True,
-                    cwd=cwd,
-                    text=True,
-                    capture_output=True
+                    cmd if argv is None else argv,
+                    shell=argv is None,
+                    cwd=cwd
                 )
 
-                # Print output
-                if result.stdout:
-                    print(result.stdout)
-                if result.stderr:
-                    print(result.stderr, file=sys.stderr)
-
                 if result.returncode != 0:
                     print(f"Command failed with exit code {result.returncode}")
                     return False
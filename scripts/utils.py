@@ -5,14 +5,45 @@ Provides common functionality for parsing YAML configs, matching platforms,
 and managing environment variables.
 """
 
+import base64
+import contextlib
+import fcntl
+import functools
 import os
 import re
+import shlex
+import shutil
+import subprocess
+import sys
 import yaml
 import hashlib
+import io
+import json
+import mmap
+import pickle
+import tempfile
+import threading
+import urllib.parse
 import urllib.request
-from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from pathlib import Path
 
+# Prefer the libyaml-backed loader when PyYAML was built with it (the PyPI
+# wheels are); the pure-Python fallback works but parses several times slower
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Repository root; relative toolchain file paths resolve against it
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+_PLUGINS_DIR = os.path.join(_PROJECT_ROOT, 'plugins')
+
+# toolchains.yml contents, loaded on first use by _get_toolchain_config
+_TOOLCHAIN_CFG: Optional[Dict[str, Any]] = None
+_TOOLCHAIN_CFG_LOCK = threading.Lock()
+
 
 class PlatformMatcher:
     """Match platform patterns against actual platform names."""
@@ -31,10 +62,16 @@ class PlatformMatcher:
     }
 
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def match(pattern: str, platform: str) -> bool:
         """
         Check if a platform matches a pattern (regex).
 
+        The pattern must match the whole platform name, so 'linux-x86_64'
+        does not select 'linux-x86_64-musl'. Results are cached per
+        (pattern, platform); configs reuse a handful of patterns against
+        four platforms.
+
         Args:
             pattern: Regex pattern from YAML config
             platform: Actual platform name
@@ -43,27 +80,159 @@ class PlatformMatcher:
             True if platform matches pattern
         """
         try:
-            return re.match(pattern, platform) is not None
+            return re.fullmatch(pattern, platform) is not None
         except re.error:
             return False
 
     @classmethod
-    def get_matching_platforms(cls, pattern: str) -> List[str]:
+    @functools.lru_cache(maxsize=None)
+    def get_matching_platforms(cls, pattern: str) -> Tuple[str, ...]:
         """
         Get all platforms that match a pattern.
 
+        Results are cached per pattern; the same few patterns recur across
+        every plugin release.
+
         Args:
             pattern: Regex pattern from YAML config
 
         Returns:
-            List of matching platform names
+            Tuple of matching platform names
         """
-        return [p for p in cls.PLATFORMS if cls.match(pattern, p)]
+        if pattern in cls.PLATFORMS:
+            # A platform name used as a pattern matches only itself
+            return (pattern,)
+        return tuple(p for p in cls.PLATFORMS if cls.match(pattern, p))
+
+
+@functools.lru_cache(maxsize=32)
+def _load_yaml_cached(path: str, mtime_ns: int) -> Any:
+    """Parse a YAML file; cached per (path, mtime) so unchanged files parse once."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+def load_yaml_file(path: str) -> Any:
+    """
+    Load a shared YAML file such as dependencies.yml or env.yml.
+
+    The parsed result is cached for the lifetime of the process and shared
+    between callers, so it must not be modified.
+
+    Args:
+        path: Path to the YAML file
+
+    Returns:
+        Parsed YAML content
+    """
+    return _load_yaml_cached(os.fspath(path), os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=256)
+def url_basename(url: str) -> str:
+    """
+    Get the file name component of a URL, ignoring any query string or fragment.
+
+    Args:
+        url: Source URL
+
+    Returns:
+        Last path segment of the URL
+    """
+    return urllib.parse.urlsplit(url).path.rsplit('/', 1)[-1]
+
+
+# {VAR} placeholder in commands, paths and env values
+_VAR_RE = re.compile(r'\{(\w+)\}')
+
+
+@functools.lru_cache(maxsize=4096)
+def _substitute(text: str, env_items: Tuple[Tuple[str, str], ...]) -> str:
+    """Replace {VAR} placeholders; cached as the env barely changes within a build."""
+    env = dict(env_items)
+    return _VAR_RE.sub(lambda m: env.get(m.group(1), m.group(0)), text)
+
+
+class EnvDict(dict):
+    """
+    Environment dict that counts its mutations.
+
+    The items snapshot used as the substitution cache key is rebuilt only
+    after the env changes, instead of on every substitute_vars call.
+    """
+
+    __slots__ = ('version', '_items', '_items_version')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+        self._items = ()
+        self._items_version = -1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+    def items_key(self) -> Tuple[Tuple[str, str], ...]:
+        """Get the items as a tuple, cached until the next mutation."""
+        if self._items_version != self.version:
+            self._items = tuple(self.items())
+            self._items_version = self.version
+        return self._items
+
+
+def _env_items(env: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    """Get the substitution cache key for an env."""
+    if isinstance(env, EnvDict):
+        return env.items_key()
+    return tuple(env.items())
+
+
+# Default install prefix per platform; Linux prefixes move under $SYSROOT when set
+_PREFIXDIR_BY_PLATFORM = {
+    'linux-x86_64-glibc': '/usr/local',
+    'linux-x86_64-musl': '/usr/local',
+    'darwin-x86_64': '/usr/local',
+    'darwin-aarch64': '/opt/homebrew',
+}
 
 
 class EnvironmentManager:
     """Manage environment variables and path substitutions."""
 
+    # Variables that change where or how fast a build runs but not what it installs
+    BUILD_NEUTRAL_ENV = frozenset({
+        'WORKDIR', 'NPROC', 'MAKE_JOBS', 'CCACHE_DIR', 'CCACHE_COMPRESS', 'CCACHE_MAXSIZE'
+    })
+
     @staticmethod
     def get_default_env(platform: str, workdir: str, prefixdir: Optional[str] = None) -> Dict[str, str]:
         """
@@ -75,10 +244,32 @@ class EnvironmentManager:
             prefixdir: Installation prefix directory (optional)
 
         Returns:
-            Dictionary of environment variables
+            Dictionary of environment variables, owned by the caller
         """
-        import os
+        return EnvDict(EnvironmentManager._build_default_env(
+            platform, workdir, prefixdir, os.environ.get('SYSROOT')
+        ))
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _build_default_env(
+        platform: str,
+        workdir: str,
+        prefixdir: Optional[str],
+        sysroot: Optional[str]
+    ) -> Dict[str, str]:
+        """
+        Build the default environment; cached per argument tuple, callers copy it.
+
+        Args:
+            platform: Platform name
+            workdir: Working directory path
+            prefixdir: Installation prefix directory or None
+            sysroot: Value of $SYSROOT or None
+
+        Returns:
+            Dictionary of environment variables
+        """
         env = {
             'WORKDIR': workdir,
         }
@@ -86,19 +277,14 @@ class EnvironmentManager:
         # Set PREFIXDIR based on platform
         if prefixdir:
             env['PREFIXDIR'] = prefixdir
-        elif platform.startswith('linux'):
+        elif sysroot is not None and platform.startswith('linux'):
             # For Linux cross-compilation, use sysroot/usr/local
-            if 'SYSROOT' in os.environ:
-                env['PREFIXDIR'] = os.environ['SYSROOT'] + '/usr/local'
-            else:
-                env['PREFIXDIR'] = '/usr/local'
-        elif platform.startswith('darwin-x86_64'):
-            env['PREFIXDIR'] = '/usr/local'
-        elif platform.startswith('darwin-aarch64'):
-            env['PREFIXDIR'] = '/opt/homebrew'
+            env['PREFIXDIR'] = sysroot + '/usr/local'
+        elif platform in _PREFIXDIR_BY_PLATFORM:
+            env['PREFIXDIR'] = _PREFIXDIR_BY_PLATFORM[platform]
 
-        if 'SYSROOT' in os.environ:
-            env['SYSROOT'] = os.environ['SYSROOT']
+        if sysroot is not None:
+            env['SYSROOT'] = sysroot
 
         # Add cross-compilation toolchain file paths
         meson_file = CrossCompilingToolchainManager.get_meson_cross_file(platform)
@@ -116,6 +302,56 @@ class EnvironmentManager:
 
         return env
 
+    @staticmethod
+    def get_parallel_env(nproc: int) -> Dict[str, str]:
+        """
+        Get variables controlling build parallelism.
+
+        NPROC is always the job count. MAKE_JOBS holds the -j flag for make,
+        and is empty when running under a parent make's jobserver so that
+        sub-makes share its job slots instead of overriding them.
+
+        Args:
+            nproc: Number of parallel jobs
+
+        Returns:
+            Dictionary with NPROC and MAKE_JOBS
+        """
+        makeflags = os.environ.get('MAKEFLAGS', '')
+        if '--jobserver-auth=' in makeflags or '--jobserver-fds=' in makeflags:
+            make_jobs = ''
+        else:
+            make_jobs = f'-j{nproc}'
+
+        return {
+            'NPROC': str(nproc),
+            'MAKE_JOBS': make_jobs,
+        }
+
+    @staticmethod
+    def apply_compiler_cache(env: Dict[str, str], workdir: str) -> None:
+        """
+        Route C/C++ compiles through ccache when VSBUILD_CCACHE=1 and it is installed.
+
+        Must be applied after the global env is merged, since that may set CC/CXX.
+
+        Args:
+            env: Environment variables to update in place
+            workdir: Working directory path, holds the cache unless CCACHE_DIR is set
+        """
+        if os.environ.get('VSBUILD_CCACHE') != '1' or not shutil.which('ccache'):
+            return
+
+        for key, default in (('CC', 'cc'), ('CXX', 'c++')):
+            compiler = env.get(key) or os.environ.get(key) or default
+            if not compiler.startswith('ccache '):
+                env[key] = f'ccache {compiler}'
+
+        if 'CCACHE_DIR' not in os.environ:
+            env['CCACHE_DIR'] = os.path.join(workdir, '.ccache')
+        env.setdefault('CCACHE_COMPRESS', '1')
+        env.setdefault('CCACHE_MAXSIZE', '5G')
+
     @staticmethod
     def substitute_vars(text: str, env: Dict[str, str]) -> str:
         """
@@ -128,10 +364,36 @@ class EnvironmentManager:
         Returns:
             Text with variables substituted
         """
-        result = text
-        for key, value in env.items():
-            result = result.replace(f"{{{key}}}", value)
-        return result
+        # Most commands and paths have no placeholders at all
+        if not env or '{' not in text:
+            return text
+
+        return _substitute(text, _env_items(env))
+
+    @staticmethod
+    def get_build_inputs(env: Dict[str, str]) -> Dict[str, str]:
+        """
+        Get the part of a build environment that determines what a build installs.
+
+        Values are substituted, BUILD_NEUTRAL_ENV variables are dropped and
+        ccache wrappers are stripped from CC/CXX.
+
+        Args:
+            env: Environment the build runs with
+
+        Returns:
+            Dictionary of environment variables
+        """
+        env_items = _env_items(env)
+        inputs = {}
+        for key, value in env_items:
+            if key in EnvironmentManager.BUILD_NEUTRAL_ENV:
+                continue
+            value = _substitute(value, env_items)
+            if key in ('CC', 'CXX') and value.startswith('ccache '):
+                value = value[len('ccache '):]
+            inputs[key] = value
+        return inputs
 
     @staticmethod
     def merge_global_env(config_env: Dict, platform: str) -> Dict[str, str]:
@@ -151,9 +413,7 @@ class EnvironmentManager:
         # Later patterns override earlier ones if they match
         for pattern, env_vars in config_env.items():
             if PlatformMatcher.match(pattern, platform):
-                # Merge env_vars into merged_env (pattern matches later override earlier)
-                for key, value in env_vars.items():
-                    merged_env[key] = value
+                merged_env.update(env_vars)
 
         return merged_env
 
@@ -161,6 +421,9 @@ class EnvironmentManager:
 class YAMLLoader:
     """Load and parse YAML plugin configuration files."""
 
+    # Configs already loaded by this process: (plugins_dir, plugin_name) -> (mtime_ns, config)
+    _memory_cache: Dict[Tuple[str, str], Tuple[int, Dict[str, Any]]] = {}
+
     @staticmethod
     def load_plugin_config(plugin_name: str, plugins_dir: str = 'plugins') -> Dict[str, Any]:
         """
@@ -171,15 +434,159 @@ class YAMLLoader:
             plugins_dir: Directory containing plugin configs
 
         Returns:
-            Parsed YAML configuration
+            Parsed YAML configuration, shared with other callers in this
+            process; it must not be modified
         """
         config_path = Path(plugins_dir) / plugin_name / f"{plugin_name}.yml"
 
         if not config_path.exists():
             raise FileNotFoundError(f"Plugin config not found: {config_path}")
 
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        memory_key = (str(plugins_dir), plugin_name)
+        mtime_ns = config_path.stat().st_mtime_ns
+        cached = YAMLLoader._memory_cache.get(memory_key)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        data = config_path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        config = YAMLLoader._load_cached(plugin_name, digest)
+        if config is None:
+            config = yaml.load(data, Loader=SafeLoader)
+            YAMLLoader._write_cache(plugin_name, digest, config)
+
+        YAMLLoader._memory_cache[memory_key] = (mtime_ns, config)
+        return config
+
+    @staticmethod
+    def load_plugin_release(
+        plugin_name: str,
+        version: str,
+        plugins_dir: str = 'plugins'
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Load plugin configuration with only one release materialized.
+
+        Without a cached parse, the YAML is composed into a node tree and only
+        the top-level sections and the matching release are constructed.
+
+        Args:
+            plugin_name: Name of the plugin
+            version: Release version to load
+            plugins_dir: Directory containing plugin configs
+
+        Returns:
+            Tuple of (configuration without releases, matching release or None)
+        """
+        config_path = Path(plugins_dir) / plugin_name / f"{plugin_name}.yml"
+
+        if not config_path.exists():
+            raise FileNotFoundError(f"Plugin config not found: {config_path}")
+
+        memory_key = (str(plugins_dir), plugin_name)
+        mtime_ns = config_path.stat().st_mtime_ns
+        cached = YAMLLoader._memory_cache.get(memory_key)
+        if cached is not None and cached[0] == mtime_ns:
+            config = cached[1]
+        else:
+            data = config_path.read_bytes()
+            config = YAMLLoader._load_cached(plugin_name, hashlib.sha256(data).hexdigest())
+            if config is not None:
+                YAMLLoader._memory_cache[memory_key] = (mtime_ns, config)
+
+        # A cached full parse is cheaper than composing the YAML again
+        if config is not None:
+            release = next((r for r in config.get('releases', []) if r['version'] == version), None)
+            return {key: value for key, value in config.items() if key != 'releases'}, release
+
+        config = {}
+        release = None
+        loader = SafeLoader(data)
+        try:
+            root = loader.get_single_node()
+            for key_node, value_node in (root.value if root is not None else []):
+                key = loader.construct_object(key_node, deep=True)
+                if key != 'releases':
+                    config[key] = loader.construct_object(value_node, deep=True)
+                    continue
+
+                for release_node in value_node.value:
+                    for field_node, field_value_node in release_node.value:
+                        if field_node.value == 'version':
+                            if loader.construct_object(field_value_node, deep=True) == version:
+                                release = loader.construct_object(release_node, deep=True)
+                            break
+                    if release is not None:
+                        break
+        finally:
+            loader.dispose()
+
+        return config, release
+
+    @staticmethod
+    def get_cache_dir() -> Path:
+        """
+        Get the directory holding parsed plugin configs.
+
+        Returns:
+            $XDG_CACHE_HOME/vsbuild/yaml (default: ~/.cache/vsbuild/yaml)
+        """
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        return Path(cache_home) / 'vsbuild' / 'yaml'
+
+    @staticmethod
+    def _load_cached(plugin_name: str, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a parsed plugin config in the pickle cache.
+
+        Entries are keyed by the SHA-256 of the YAML content, so they stay
+        valid across checkouts.
+
+        Args:
+            plugin_name: Name of the plugin
+            digest: SHA-256 hex digest of the plugin YAML
+
+        Returns:
+            Parsed configuration, or None if not cached or unreadable
+        """
+        cache_path = YAMLLoader.get_cache_dir() / f"{plugin_name}.{digest}.pkl"
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # A missing, truncated or incompatible entry is a cache miss
+            return None
+
+    @staticmethod
+    def _write_cache(plugin_name: str, digest: str, config: Any) -> None:
+        """
+        Atomically write a parsed plugin config to the cache, dropping stale entries.
+
+        Args:
+            plugin_name: Name of the plugin
+            digest: SHA-256 hex digest of the plugin YAML
+            config: Parsed configuration
+        """
+        cache_dir = YAMLLoader.get_cache_dir()
+        cache_path = cache_dir / f"{plugin_name}.{digest}.pkl"
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+
+            for stale in cache_dir.glob(f"{plugin_name}.*.pkl"):
+                if stale != cache_path:
+                    stale.unlink(missing_ok=True)
+
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(config, f, protocol=5)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            # Caching is best-effort; an unwritable cache directory still works
+            pass
 
     @staticmethod
     def get_all_plugins(plugins_dir: str = 'plugins') -> List[str]:
@@ -193,17 +600,16 @@ class YAMLLoader:
             List of plugin names
         """
         plugins = []
-        plugins_path = Path(plugins_dir)
 
-        if not plugins_path.exists():
+        try:
+            # DirEntry.is_dir() answers from readdir; only the config check stats
+            with os.scandir(plugins_dir) as it:
+                for entry in it:
+                    if entry.is_dir() and os.path.exists(os.path.join(entry.path, f"{entry.name}.yml")):
+                        plugins.append(entry.name)
+        except FileNotFoundError:
             return []
 
-        for item in plugins_path.iterdir():
-            if item.is_dir():
-                config_file = item / f"{item.name}.yml"
-                if config_file.exists():
-                    plugins.append(item.name)
-
         return sorted(plugins)
 
     @staticmethod
@@ -215,62 +621,561 @@ class YAMLLoader:
             plugins_dir: Directory containing plugin configs
 
         Returns:
-            Parsed toolchain configuration or empty dict if not found
+            Parsed toolchain configuration or empty dict if not found; cached
+            per file mtime and shared between callers, so it must not be modified
         """
         toolchains_path = Path(plugins_dir) / 'toolchains.yml'
 
-        if not toolchains_path.exists():
+        try:
+            mtime_ns = toolchains_path.stat().st_mtime_ns
+        except FileNotFoundError:
             print(f"Warning: toolchains.yml not found at {toolchains_path}")
             return {}
 
-        with open(toolchains_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return _load_yaml_cached(str(toolchains_path), mtime_ns)
+
+    @staticmethod
+    def clear_cache() -> None:
+        """
+        Drop all configs cached in this process and everything derived from them.
+
+        Besides the plugin and YAML caches this resets the loaded toolchains.yml,
+        the toolchain lookups and the default environments built from them.
+        """
+        global _TOOLCHAIN_CFG
+
+        YAMLLoader._memory_cache.clear()
+        _load_yaml_cached.cache_clear()
+
+        with _TOOLCHAIN_CFG_LOCK:
+            _TOOLCHAIN_CFG = None
+        for getter in (
+            CrossCompilingToolchainManager.get_toolchain_config,
+            CrossCompilingToolchainManager.get_toolchain_bin_path,
+            CrossCompilingToolchainManager.get_sysroot_path,
+            CrossCompilingToolchainManager.get_meson_cross_file,
+            CrossCompilingToolchainManager.get_cmake_toolchain_file,
+        ):
+            getter.cache_clear()
+        EnvironmentManager._build_default_env.cache_clear()
 
 
 class FileDownloader:
     """Download and verify files."""
 
     @staticmethod
-    def verify_hash(filepath: str, hash_str: str) -> bool:
+    def _parse_hash(hash_str: str) -> Tuple[str, str]:
         """
-        Verify file hash.
+        Split a hash string into hashlib algorithm name and expected digest.
 
         Args:
-            filepath: Path to file
             hash_str: Hash string in format 'algorithm:hash'
 
         Returns:
-            True if hash matches
+            Tuple of (algorithm, expected_hash)
         """
         algorithm, expected_hash = hash_str.split(':', 1)
 
         if algorithm == 'sha256sum':
             algorithm = 'sha256'
 
-        hasher = hashlib.new(algorithm)
+        return algorithm, expected_hash
+
+    @staticmethod
+    def verify_hash(filepath: str, hash_str: str) -> bool:
+        """
+        Verify file hash.
+
+        Args:
+            filepath: Path to file
+            hash_str: Hash string in format 'algorithm:hash'
+
+        Returns:
+            True if hash matches
+        """
+        algorithm, expected_hash = FileDownloader._parse_hash(hash_str)
 
         with open(filepath, 'rb') as f:
-            while chunk := f.read(8192):
-                hasher.update(chunk)
+            try:
+                # Hash the whole file in one update straight from the page cache
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise'):
+                        # Read-ahead aggressively; the file is scanned once front to back
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    hasher = hashlib.new(algorithm)
+                    hasher.update(mm)
+            except (ValueError, OSError):
+                # Empty files and filesystems without mmap support
+                f.seek(0)
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                if hasattr(hashlib, 'file_digest'):
+                    hasher = hashlib.file_digest(f, algorithm)
+                else:
+                    # Reuse one buffer instead of allocating bytes per chunk
+                    hasher = hashlib.new(algorithm)
+                    view = memoryview(bytearray(4 << 20))
+                    while n := f.readinto(view):
+                        hasher.update(view[:n])
 
         actual_hash = hasher.hexdigest()
         return actual_hash == expected_hash
 
     @staticmethod
-    def download_file(url: str, dest: str) -> None:
+    def download_file(url: str, dest: str, expected_hash: Optional[str] = None) -> None:
         """
         Download a file from URL.
 
+        When a hash is given the data is hashed as it is written, so the file
+        does not have to be read back for verification.
+
         Args:
             url: Source URL
             dest: Destination file path
+            expected_hash: Optional hash string in format 'algorithm:hash'
+
+        Raises:
+            ValueError: If the downloaded file does not match expected_hash
         """
         print(f"Downloading {url} to {dest}")
 
         dest_path = Path(dest)
         dest_path.parent.mkdir(parents=True, exist_ok=True)
 
-        urllib.request.urlretrieve(url, dest)
+        hasher = None
+        if expected_hash:
+            algorithm, expected_digest = FileDownloader._parse_hash(expected_hash)
+            hasher = hashlib.new(algorithm)
+
+        # Ask for the raw bytes so the hash is computed over what is stored
+        request = urllib.request.Request(url, headers={'Accept-Encoding': 'identity'})
+        with urllib.request.urlopen(request, timeout=60) as response, open(dest, 'wb') as f:
+            if hasher:
+                while chunk := response.read(1 << 20):
+                    hasher.update(chunk)
+                    f.write(chunk)
+            else:
+                shutil.copyfileobj(response, f, 1 << 20)
+
+        if hasher:
+            if hasher.hexdigest() != expected_digest:
+                # Do not leave a corrupt file behind to be picked up as cached
+                dest_path.unlink()
+                raise ValueError(f"Hash verification failed for {dest_path.name}")
+            print("Hash verification passed")
+
+
+class GitCache:
+    """
+    Clone git repositories, optionally borrowing objects from persistent bare mirrors.
+
+    Mirrors only pay off when the cache directory survives between runs, so
+    they are opt-in via VSBUILD_GIT_MIRROR=1.
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Check whether git mirrors are enabled.
+
+        Returns:
+            True if VSBUILD_GIT_MIRROR=1
+        """
+        return os.environ.get('VSBUILD_GIT_MIRROR') == '1'
+
+    @staticmethod
+    def get_cache_dir() -> Path:
+        """
+        Get the directory holding git mirrors.
+
+        Returns:
+            $XDG_CACHE_HOME/vsbuild/git (default: ~/.cache/vsbuild/git)
+        """
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        return Path(cache_home) / 'vsbuild' / 'git'
+
+    @staticmethod
+    def ensure_mirror(url: str) -> str:
+        """
+        Create or update the mirror of a repository.
+
+        Concurrent builds of the same repository serialize on a lock file
+        next to the mirror.
+
+        Args:
+            url: Repository URL
+
+        Returns:
+            Path to the bare mirror, keyed by sha256 of the URL
+        """
+        cache_dir = GitCache.get_cache_dir()
+        mirror_path = cache_dir / hashlib.sha256(url.encode('utf-8')).hexdigest()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        with open(f"{mirror_path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            if mirror_path.exists():
+                print(f"Updating git mirror for {url}...")
+                subprocess.run(
+                    ['git', 'remote', 'update', '--prune'],
+                    cwd=str(mirror_path),
+                    check=True
+                )
+            else:
+                print(f"Creating git mirror for {url}...")
+                # Clone next to the mirror so an interrupted clone is never picked up
+                tmp_path = Path(tempfile.mkdtemp(dir=cache_dir, suffix='.tmp'))
+                try:
+                    subprocess.run(
+                        ['git', 'clone', '--mirror', url, str(tmp_path)],
+                        check=True
+                    )
+                    os.rename(tmp_path, mirror_path)
+                finally:
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+
+        return str(mirror_path)
+
+    @staticmethod
+    def clone(url: str, dest: str, tag: Optional[str] = None) -> None:
+        """
+        Clone a repository, borrowing objects from its local mirror when enabled.
+
+        Args:
+            url: Repository URL
+            dest: Destination directory
+            tag: Optional tag, branch or commit to check out
+        """
+        clone_args = ['git', 'clone', '--filter=blob:none']
+        if GitCache.is_enabled():
+            # Borrow objects from the local mirror, then detach from it
+            mirror_path = GitCache.ensure_mirror(url)
+            clone_args += ['--reference', mirror_path, '--dissociate']
+        print(f"Cloning {url}...")
+        if tag is None:
+            subprocess.run(clone_args + [url, dest], check=True)
+            return
+
+        # Only fetch the tagged commit
+        result = subprocess.run(clone_args + ['--depth=1', '--branch', tag, '--single-branch', url, dest])
+        if result.returncode == 0:
+            return
+
+        # Not a tag or branch name (e.g. a commit hash), fetch the commit itself
+        print(f"{tag} is not a branch or tag, fetching it directly...")
+        shutil.rmtree(dest, ignore_errors=True)
+        subprocess.run(clone_args + ['--no-checkout', url, dest], check=True)
+        subprocess.run(['git', 'fetch', '--depth=1', 'origin', tag], cwd=dest, check=True)
+        subprocess.run(['git', 'checkout', 'FETCH_HEAD'], cwd=dest, check=True)
+
+
+class ArtifactCache:
+    """
+    Cache the files a dependency installs into the prefix, keyed by its build inputs.
+
+    Entries hold only the dependency's own files, so its sub-dependencies
+    must be installed separately. Opt-in via VSBUILD_ARTIFACT_CACHE=1.
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        Check whether the artifact cache is enabled.
+
+        Returns:
+            True if VSBUILD_ARTIFACT_CACHE=1
+        """
+        return os.environ.get('VSBUILD_ARTIFACT_CACHE') == '1'
+
+    @staticmethod
+    @contextlib.contextmanager
+    def prefix_lock(prefixdir: str) -> Iterator[bool]:
+        """
+        Hold an exclusive lock on a prefix while it is snapshotted, built into or restored.
+
+        Concurrent builds into the same prefix would otherwise leak their
+        files into each other's entries.
+
+        Args:
+            prefixdir: Installation prefix directory
+
+        Yields:
+            True if the lock is held, False if the prefix cannot be locked
+        """
+        try:
+            lock_dir = os.path.join(prefixdir, '.stamps')
+            os.makedirs(lock_dir, exist_ok=True)
+            lock_file = open(os.path.join(lock_dir, 'prefix.lock'), 'w')
+        except OSError:
+            yield False
+            return
+
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield True
+
+    @staticmethod
+    def get_cache_dir() -> Path:
+        """
+        Get the directory holding cached artifacts.
+
+        Returns:
+            $XDG_CACHE_HOME/vsbuild/artifacts (default: ~/.cache/vsbuild/artifacts)
+        """
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        return Path(cache_home) / 'vsbuild' / 'artifacts'
+
+    @staticmethod
+    def get_key(
+        dep_name: str,
+        dep_version: str,
+        platform: str,
+        version_config: Dict[str, Any],
+        env: Dict[str, str]
+    ) -> str:
+        """
+        Compute the cache key of a dependency build.
+
+        The recipe covers the source URL, tag and hash as well as the build
+        commands; the environment covers the toolchain and the prefix the
+        files were configured for, as returned by EnvironmentManager.get_build_inputs.
+
+        Args:
+            dep_name: Dependency name
+            dep_version: Dependency version
+            platform: Target platform
+            version_config: Version configuration dict
+            env: Environment the build runs with
+
+        Returns:
+            Hex digest identifying the build
+        """
+        build_env = EnvironmentManager.get_build_inputs(env)
+        payload = json.dumps([dep_name, dep_version, platform, version_config, build_env], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def snapshot(prefixdir: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Record the files currently installed in a prefix.
+
+        Args:
+            prefixdir: Installation prefix directory
+
+        Returns:
+            Dict mapping relative paths to (size, mtime_ns)
+        """
+        files = {}
+        for root, dirs, filenames in os.walk(prefixdir):
+            if root == prefixdir and '.stamps' in dirs:
+                dirs.remove('.stamps')
+            for name in filenames + [d for d in dirs if os.path.islink(os.path.join(root, d))]:
+                path = os.path.join(root, name)
+                st = os.lstat(path)
+                files[os.path.relpath(path, prefixdir)] = (st.st_size, st.st_mtime_ns)
+        return files
+
+    @staticmethod
+    def restore(key: str, prefixdir: str) -> bool:
+        """
+        Copy cached artifacts into a prefix.
+
+        Args:
+            key: Cache key from get_key
+            prefixdir: Installation prefix directory
+
+        Returns:
+            True if the artifacts were cached and restored
+        """
+        entry = ArtifactCache.get_cache_dir() / key
+        if not entry.is_dir():
+            return False
+        shutil.copytree(entry, prefixdir, symlinks=True, dirs_exist_ok=True)
+        return True
+
+    @staticmethod
+    def store(key: str, prefixdir: str, before: Dict[str, Tuple[int, int]]) -> None:
+        """
+        Save the files a build added or changed in a prefix.
+
+        Args:
+            key: Cache key from get_key
+            prefixdir: Installation prefix directory
+            before: Snapshot taken before the build
+        """
+        cache_dir = ArtifactCache.get_cache_dir()
+        entry = cache_dir / key
+        if entry.exists():
+            return
+
+        after = ArtifactCache.snapshot(prefixdir)
+        changed = [path for path, state in after.items() if before.get(path) != state]
+
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = Path(tempfile.mkdtemp(dir=cache_dir, suffix='.tmp'))
+        except OSError:
+            return
+
+        try:
+            for path in changed:
+                dest = tmp_path / path
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(os.path.join(prefixdir, path), dest, follow_symlinks=False)
+            os.rename(tmp_path, entry)
+        except OSError:
+            # Another build stored the same key first, or the cache is not writable
+            pass
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+# Characters that need /bin/sh to interpret a command line. Quotes are not
+# listed: shlex.split handles them the same way the shell does.
+_SHELL_METACHARS = frozenset(';|&><$`*?[](){}~#!\\\n')
+
+# Builtins and keywords the shell handles itself, even where an executable
+# of the same name exists on PATH
+_SHELL_BUILTINS = frozenset({
+    '.', ':', 'alias', 'bg', 'break', 'case', 'cd', 'command', 'continue', 'declare',
+    'do', 'done', 'elif', 'else', 'esac', 'eval', 'exec', 'exit', 'export', 'false',
+    'fg', 'fi', 'for', 'function', 'getopts', 'hash', 'if', 'jobs', 'local', 'popd',
+    'pushd', 'read', 'readonly', 'return', 'select', 'set', 'shift', 'source', 'then',
+    'time', 'times', 'trap', 'true', 'type', 'typeset', 'ulimit', 'umask', 'unalias',
+    'unset', 'until', 'wait', 'while'
+})
+
+
+def split_command(cmd: str, path: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Split a command line into argv when it can run without the shell.
+
+    Args:
+        cmd: Command line after variable substitution
+        path: PATH the command runs with (default: $PATH)
+
+    Returns:
+        Argument list, or None if the command uses shell syntax, builtins,
+        variable assignments or a program not found on PATH
+    """
+    if any(c in _SHELL_METACHARS for c in cmd):
+        return None
+
+    try:
+        tokens = shlex.split(cmd)
+    except ValueError:
+        # Unbalanced quotes; let the shell report it
+        return None
+
+    if not tokens or tokens[0] in _SHELL_BUILTINS or '=' in tokens[0]:
+        return None
+
+    # Let the shell handle anything that is not a program, e.g. a builtin missing above;
+    # paths are resolved against the command's cwd, which which() does not know
+    if '/' not in tokens[0] and shutil.which(tokens[0], path=path) is None:
+        return None
+    return tokens
+
+
+class BuildRunner:
+    """Run build commands from a build configuration."""
+
+    @staticmethod
+    def execute(
+        build_config: Dict[str, Any],
+        env: Dict[str, str],
+        workdir: str,
+        base_env: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Execute build commands.
+
+        Args:
+            build_config: Build configuration with env and commands
+            env: Variables for substitution and the build environment
+            workdir: Initial working directory for commands
+            base_env: Process environment snapshot to build on (default: os.environ)
+        """
+        if base_env is None:
+            base_env = os.environ
+
+        # env does not change while the commands run; snapshot it once for every substitution
+        env_items = _env_items(env)
+
+        def substitute(text: str) -> str:
+            return _substitute(text, env_items) if '{' in text else text
+
+        # env variables (includes DL_FILE_NAME, WORKDIR, etc.) with variables substituted
+        resolved_env = {key: substitute(value) for key, value in env_items}
+
+        # build_config env accumulates onto values for the same variables
+        overlay = {}
+        for key, value in build_config.get('env', {}).items():
+            # Substitute variables in environment values
+            value = substitute(value)
+
+            existing_value = resolved_env.get(key, base_env.get(key))
+            if existing_value is None:
+                # Variable doesn't exist yet, just set it
+                overlay[key] = value
+            elif existing_value and value:
+                # Append with space separator
+                overlay[key] = f"{existing_value} {value}"
+            else:
+                # If either is empty, use the non-empty one (or the new one)
+                overlay[key] = value or existing_value
+
+        # Merge everything over the base environment in one go; every command shares this dict
+        build_env = {**base_env, **resolved_env, **overlay}
+
+        # Execute commands
+        commands = build_config.get('commands', [])
+        current_cwd = workdir  # Track current working directory
+        cwd = substitute(current_cwd)
+
+        for cmd_entry in commands:
+            if isinstance(cmd_entry, dict):
+                # Update cwd if specified, otherwise keep current
+                if 'cwd' in cmd_entry and cmd_entry['cwd'] != current_cwd:
+                    current_cwd = cmd_entry['cwd']
+                    cwd = substitute(current_cwd)
+                cmd = cmd_entry['cmd']
+            else:
+                cmd = cmd_entry
+
+            # Substitute variables in command
+            cmd = substitute(cmd)
+
+            # Flush so the header is written before the command's own output
+            print(f"\n[{cwd}]$ {cmd}", flush=True)
+
+            # Execute command, skipping the intermediate shell when it is not needed
+            argv = split_command(cmd, build_env.get('PATH'))
+            if argv is None:
+                args, shell = cmd, True
+            else:
+                args, shell = argv, False
+
+            # Keep inherited descriptors open so a parent make's jobserver pipe survives
+            run_kwargs = dict(
+                cwd=cwd,
+                env=build_env,
+                stdout=sys.stdout.fileno(),
+                stderr=sys.stderr.fileno(),
+                close_fds=False
+            )
+            try:
+                result = subprocess.run(args, shell=shell, **run_kwargs)
+            except OSError:
+                if shell:
+                    raise
+                # A missing, non-executable or shebang-less script; the shell
+                # runs it or reports it with its usual exit status
+                result = subprocess.run(cmd, shell=True, **run_kwargs)
+
+            if result.returncode != 0:
+                raise RuntimeError(f"Command failed with exit code {result.returncode}")
 
 
 class BuildConfigResolver:
@@ -330,6 +1235,38 @@ class BuildConfigResolver:
                 return dep_list
         return []
 
+    @staticmethod
+    def get_dependency_graph(dep_list: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        Get build ordering constraints for a dependency list.
+
+        A dependency may declare 'depends_on' with the names of other entries
+        in the same list it must be built after. Entries without 'depends_on'
+        keep the sequential behaviour and wait for every entry listed before them.
+
+        Args:
+            dep_list: List of dependency dicts as returned by get_dependencies
+
+        Returns:
+            Dictionary mapping dependency name to the names it must wait for
+        """
+        names = [dep['name'] for dep in dep_list]
+        graph = {}
+
+        for index, dep in enumerate(dep_list):
+            if 'depends_on' in dep:
+                depends_on = list(dep['depends_on'] or [])
+                for name in depends_on:
+                    if name not in names:
+                        raise ValueError(
+                            f"Dependency {dep['name']} depends on {name}, which is not in the dependency list"
+                        )
+            else:
+                depends_on = names[:index]
+            graph[dep['name']] = depends_on
+
+        return graph
+
 
 class CrossCompilingToolchainManager:
     """
@@ -339,26 +1276,32 @@ class CrossCompilingToolchainManager:
 
     # Default toolchain base path
     DEFAULT_TOOLCHAIN_PATH = os.path.expanduser('~/x-tools')
-    _toolchain_config_cache = None
 
-    @classmethod
-    def _get_toolchain_config(cls) -> Dict[str, Any]:
+    @staticmethod
+    def _get_toolchain_config() -> Dict[str, Any]:
         """
         Load and cache toolchain configuration from toolchains.yml.
 
+        Dependency builds run in threads, so the first load is serialized.
+
         Returns:
             Toolchain configuration dict
         """
-        if cls._toolchain_config_cache is None:
-            plugins_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'plugins')
-            cls._toolchain_config_cache = YAMLLoader.load_toolchains_config(plugins_dir)
-        return cls._toolchain_config_cache.get('toolchains', {})
+        global _TOOLCHAIN_CFG
+        if _TOOLCHAIN_CFG is None:
+            with _TOOLCHAIN_CFG_LOCK:
+                if _TOOLCHAIN_CFG is None:
+                    _TOOLCHAIN_CFG = YAMLLoader.load_toolchains_config(_PLUGINS_DIR)
+        return _TOOLCHAIN_CFG.get('toolchains', {})
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def get_toolchain_config(cls, platform: str) -> Optional[Dict[str, Any]]:
         """
         Get toolchain configuration for a specific platform.
 
+        Results are cached per platform; toolchains.yml is read once per process.
+
         Args:
             platform: Platform name (e.g., 'linux-x86_64-musl')
 
@@ -383,6 +1326,7 @@ class CrossCompilingToolchainManager:
         return config.get('triplet') if config else None
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_toolchain_bin_path(platform: str) -> Optional[str]:
         """
         Get the toolchain binary directory path for a platform.
@@ -404,6 +1348,7 @@ class CrossCompilingToolchainManager:
         return None
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_sysroot_path(platform: str) -> Optional[str]:
         """
         Get the sysroot path for a platform.
@@ -461,10 +1406,13 @@ class CrossCompilingToolchainManager:
         return env
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_meson_cross_file(platform: str, toolchains_dir: str = 'toolchains') -> Optional[str]:
         """
         Get the path to meson cross file for a platform.
 
+        Results are cached per platform, so the file is checked for once.
+
         Args:
             platform: Platform name
             toolchains_dir: Directory containing toolchain config files
@@ -482,8 +1430,7 @@ class CrossCompilingToolchainManager:
         if meson_file:
             # Check if absolute path, if not, make it relative to project root
             if not os.path.isabs(meson_file):
-                project_root = os.path.dirname(os.path.dirname(__file__))
-                meson_file = os.path.join(project_root, meson_file)
+                meson_file = os.path.join(_PROJECT_ROOT, meson_file)
 
             if os.path.exists(meson_file):
                 return meson_file
@@ -491,10 +1438,13 @@ class CrossCompilingToolchainManager:
         return None
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_cmake_toolchain_file(platform: str, toolchains_dir: str = 'toolchains') -> Optional[str]:
         """
         Get the path to cmake toolchain file for a platform.
 
+        Results are cached per platform, so the file is checked for once.
+
         Args:
             platform: Platform name
             toolchains_dir: Directory containing toolchain config files
@@ -512,8 +1462,7 @@ class CrossCompilingToolchainManager:
         if cmake_file:
             # Check if absolute path, if not, make it relative to project root
             if not os.path.isabs(cmake_file):
-                project_root = os.path.dirname(os.path.dirname(__file__))
-                cmake_file = os.path.join(project_root, cmake_file)
+                cmake_file = os.path.join(_PROJECT_ROOT, cmake_file)
 
             if os.path.exists(cmake_file):
                 return cmake_file
@@ -553,42 +1502,80 @@ class CrossCompilingToolchainManager:
                 build_env['PATH'] = bin_path
 
 
+# Per-thread zstd decompression contexts; a context is not safe to share between threads
+_zstd_local = threading.local()
+
+
+def _zstd_decompressor():
+    """Return this thread's ZstdDecompressor, creating it on first use."""
+    dctx = getattr(_zstd_local, 'dctx', None)
+    if dctx is None:
+        # zstandard is only needed when a zstd attachment exists
+        import zstandard as zstd
+        dctx = _zstd_local.dctx = zstd.ZstdDecompressor()
+    return dctx
+
+
+def _write_attachment(filename: str, config: Dict[str, Any], env: Dict[str, str]) -> Path:
+    """
+    Write a single attachment file.
+
+    Args:
+        filename: Attachment file name
+        config: Attachment entry with 'path', 'encoding' and 'data'
+        env: Environment variables for path substitution
+
+    Returns:
+        Path of the written file
+    """
+    path = EnvironmentManager.substitute_vars(config['path'], env)
+    encoding = config['encoding']
+    data = config['data']
+
+    # Create directory if needed
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+    filepath = Path(path) / filename
+
+    if encoding == 'text/utf-8':
+        # Substitute variables in text content
+        content = EnvironmentManager.substitute_vars(data, env)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(content)
+    elif encoding == 'base64/zstd':
+        # Decode base64 and stream-decompress zstd straight into the file
+        compressed = io.BytesIO(base64.b64decode(data))
+        with open(filepath, 'wb') as f:
+            _zstd_decompressor().copy_stream(compressed, f, read_size=1 << 17, write_size=1 << 17)
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+    return filepath
+
+
 def create_attachment_files(attachments: Dict[str, Any], env: Dict[str, str]) -> None:
     """
     Create attachment files from YAML configuration.
 
+    Files are independent, so more than two are written concurrently;
+    zstd decompression and file writes release the GIL.
+
     Args:
         attachments: Attachments section from YAML
         env: Environment variables for path substitution
     """
-    import base64
-    import zstandard as zstd
-
-    for filename, config in attachments.items():
-        path = EnvironmentManager.substitute_vars(config['path'], env)
-        encoding = config['encoding']
-        data = config['data']
-
-        # Create directory if needed
-        Path(path).mkdir(parents=True, exist_ok=True)
-
-        filepath = Path(path) / filename
-
-        if encoding == 'text/utf-8':
-            # Substitute variables in text content
-            content = EnvironmentManager.substitute_vars(data, env)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-        elif encoding == 'base64/zstd':
-            # Decode base64 and decompress zstd
-            compressed = base64.b64decode(data)
-            decompressed = zstd.decompress(compressed)
-            with open(filepath, 'wb') as f:
-                f.write(decompressed)
-        else:
-            raise ValueError(f"Unsupported encoding: {encoding}")
-
-        print(f"Created attachment: {filepath}")
+    items = list(attachments.items())
+
+    if len(items) > 2:
+        with ThreadPoolExecutor(max_workers=min(8, len(items))) as pool:
+            filepaths = pool.map(lambda item: _write_attachment(item[0], item[1], env), items)
+            # Report in config order, as the serial loop did
+            for filepath in filepaths:
+                print(f"Created attachment: {filepath}")
+    else:
+        for filename, config in items:
+            filepath = _write_attachment(filename, config, env)
+            print(f"Created attachment: {filepath}")
 
 
 if __name__ == '__main__':